@@ -0,0 +1,28 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+
+def run_view(view, request, *args, **kwargs):
+    """Синхронная вьюха в потоке пула со своим соединением с базой."""
+    close_old_connections()
+    try:
+        return view(request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+def offload(view):
+    """Асинхронная обёртка над синхронной вьюхой DRF.
+
+    В Django 3.2 нет асинхронного ORM, а синхронные вьюхи под ASGI
+    выполняются по очереди в одном потоке. Поэтому запросы к базе и
+    сериализация уходят в пул потоков, а цикл событий свободен.
+    """
+    @functools.wraps(view)
+    async def async_view(request, *args, **kwargs):
+        return await sync_to_async(run_view, thread_sensitive=False)(
+            view, request, *args, **kwargs)
+
+    return async_view
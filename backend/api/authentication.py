@@ -0,0 +1,88 @@
+import threading
+from collections import Counter
+
+from cachetools import TTLCache
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from users.models import User
+
+_lock = threading.Lock()
+_local = TTLCache(maxsize=settings.TOKEN_CACHE_LOCAL_SIZE,
+                  ttl=settings.TOKEN_CACHE_LOCAL_TTL)
+stats = Counter()
+
+
+def token_cache_key(key):
+    """Ключ токена в общем кеше."""
+    return f'auth:token-user:{key}'
+
+
+def cached_user(pk, is_active):
+    """Пользователь, у которого загружены только id и is_active.
+
+    Остальные поля читаются из базы при первом обращении, поэтому
+    закешированный пользователь никогда не бывает устаревшим.
+    """
+    return User.from_db(User.objects.db, ['id', 'is_active'],
+                        [pk, is_active])
+
+
+def invalidate_token(key):
+    """Убрать токен из кеша процесса и общего кеша."""
+    with _lock:
+        _local.pop(key, None)
+    cache.delete(token_cache_key(key))
+
+
+def invalidate_user_tokens(user_ids):
+    """Убрать из кешей все токены пользователей.
+
+    Нужно после QuerySet.update(), который не шлёт post_save.
+    """
+    for key in Token.objects.filter(
+            user_id__in=user_ids).values_list('key', flat=True):
+        invalidate_token(key)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Аутентификация по токену с кешем токен -> id пользователя.
+
+    Сначала LRU с TTL в памяти процесса, затем общий кеш Django,
+    и только потом база данных. В кеше лежат только id и is_active.
+    """
+
+    def authenticate(self, request):
+        self.source = None
+        result = super().authenticate(request)
+        metrics = getattr(request, 'metrics', None)
+        if metrics is not None:
+            metrics.auth = self.source
+        return result
+
+    def authenticate_credentials(self, key):
+        with _lock:
+            credentials = _local.get(key)
+        self.source = 'local'
+        if credentials is None:
+            credentials = cache.get(token_cache_key(key))
+            self.source = 'shared'
+        if credentials is None:
+            user, _token = super().authenticate_credentials(key)
+            credentials = (user.pk, user.is_active)
+            cache.set(token_cache_key(key), credentials,
+                      settings.TOKEN_CACHE_TIMEOUT)
+            self.source = 'db'
+        else:
+            user = cached_user(*credentials)
+            if not user.is_active:
+                raise AuthenticationFailed(_('User inactive or deleted.'))
+        with _lock:
+            if self.source != 'local':
+                _local[key] = credentials
+            stats[self.source] += 1
+        return user, Token(key=key, user=user)
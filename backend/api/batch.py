@@ -0,0 +1,126 @@
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from rest_framework.response import Response
+
+from recipes import counters, feed, shopping_list, signals
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Follow, User
+
+from .serializers import BatchIdsSerializer
+
+
+class BatchRelation:
+    """Связи пользователя с объектами, которые меняются пачкой.
+
+    bulk_create не вызывает сигналы моделей, а удаление идёт с
+    заглушёнными обработчиками, поэтому счётчики и список покупок
+    обновляет on_change. Строка пользователя блокируется до проверки
+    связей, так что два одновременных пакета не посчитают одно и то же.
+    """
+
+    def __init__(self, model, target_model, field, on_change):
+        """Модель связи, модель объектов, поле связи и обработчик."""
+        self.model = model
+        self.target_model = target_model
+        self.field = field
+        self.on_change = on_change
+
+    def linked(self, user, ids):
+        """Найденные id и есть ли у пользователя связь, один запрос."""
+        links = self.model.objects.filter(
+            user=user, **{self.field: OuterRef('pk')})
+        return dict(self.target_model.objects.filter(
+            pk__in=ids
+        ).annotate(linked=Exists(links)).values_list('pk', 'linked'))
+
+    @staticmethod
+    def lock(user):
+        """Пакеты одного пользователя выполняются по очереди."""
+        list(User.objects.select_for_update().filter(pk=user.pk).values('pk'))
+
+    def add(self, user, ids, forbidden=()):
+        """Добавить связи одним bulk_create."""
+        with transaction.atomic():
+            self.lock(user)
+            linked = self.linked(user, ids)
+            created = [pk for pk, is_linked in linked.items()
+                       if not is_linked and pk not in forbidden]
+            self.model.objects.bulk_create(
+                [self.model(user=user, **{f'{self.field}_id': pk})
+                 for pk in created],
+                ignore_conflicts=True)
+            if created:
+                self.on_change(user, created, 1)
+        return results(ids, linked, created, 'created', 'exists', forbidden)
+
+    def remove(self, user, ids):
+        """Удалить связи без обработчиков сигналов на каждую строку."""
+        with transaction.atomic():
+            self.lock(user)
+            linked = self.linked(user, ids)
+            removed = [pk for pk, is_linked in linked.items() if is_linked]
+            if removed:
+                with signals.muted():
+                    self.model.objects.filter(
+                        user=user, **{f'{self.field}_id__in': removed}
+                    ).delete()
+                self.on_change(user, removed, -1)
+        return results(ids, linked, removed, 'deleted', 'absent')
+
+
+def results(ids, linked, changed, changed_status, unchanged_status,
+            forbidden=()):
+    """Статус каждого id в порядке запроса."""
+    changed = set(changed)
+    statuses = []
+    for pk in dict.fromkeys(ids):
+        if pk not in linked:
+            item_status = 'not_found'
+        elif pk in forbidden:
+            item_status = 'forbidden'
+        elif pk in changed:
+            item_status = changed_status
+        else:
+            item_status = unchanged_status
+        statuses.append({'id': pk, 'status': item_status})
+    return statuses
+
+
+def change_favorites(user, recipe_ids, delta):
+    """Счётчики избранного у рецептов."""
+    counters.change('favorites_count', recipe_ids, delta)
+
+
+def change_shopping_list(user, recipe_ids, delta):
+    """Список покупок пользователя."""
+    if delta > 0:
+        shopping_list.add_recipes(user.pk, recipe_ids)
+    else:
+        shopping_list.remove_recipes(user.pk, recipe_ids)
+
+
+def change_followers(user, author_ids, delta):
+    """Счётчики подписчиков у авторов и лента пользователя."""
+    counters.change('followers_count', author_ids, delta)
+    if delta > 0:
+        feed.follow(user.pk, author_ids)
+    else:
+        feed.unfollow(user.pk, author_ids)
+
+
+favorites = BatchRelation(Favorite, Recipe, 'recipe', change_favorites)
+shopping_cart = BatchRelation(ShoppingCart, Recipe, 'recipe',
+                              change_shopping_list)
+subscriptions = BatchRelation(Follow, User, 'author', change_followers)
+
+
+def batch_response(relation, request, forbidden=()):
+    """POST добавляет, DELETE удаляет пачку id из тела запроса."""
+    serializer = BatchIdsSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    ids = serializer.validated_data['ids']
+    if request.method == 'POST':
+        statuses = relation.add(request.user, ids, forbidden)
+    else:
+        statuses = relation.remove(request.user, ids)
+    return Response({'results': statuses})
@@ -0,0 +1,65 @@
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+CATALOGUE_VERSION_KEY = 'catalogue:version'
+
+
+def bump_catalogue_version():
+    """Новая версия справочников: теги или ингредиенты изменились."""
+    catalogue = {'version': uuid.uuid4().hex, 'modified': int(time.time())}
+    cache.set(CATALOGUE_VERSION_KEY, catalogue, None)
+    return catalogue
+
+
+def get_catalogue_version():
+    """Текущая версия справочников и время её изменения."""
+    catalogue = cache.get(CATALOGUE_VERSION_KEY)
+    if catalogue is None:
+        catalogue = {'version': uuid.uuid4().hex,
+                     'modified': int(time.time())}
+        cache.add(CATALOGUE_VERSION_KEY, catalogue, None)
+        catalogue = cache.get(CATALOGUE_VERSION_KEY, catalogue)
+    return catalogue
+
+
+class CatalogueCacheMixin:
+    """Кеш ответов справочника с ETag/Last-Modified и ответом 304."""
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Ответ из кеша текущей версии справочников."""
+        catalogue = get_catalogue_version()
+        path = hashlib.md5(
+            f'{request.accepted_renderer.format}:{request.get_full_path()}'
+            .encode()
+        ).hexdigest()
+        etag = quote_etag(f'{catalogue["version"]}-{path}')
+        response = get_conditional_response(
+            request, etag=etag, last_modified=catalogue['modified'])
+        if response is None:
+            key = f'catalogue:{catalogue["version"]}:{path}'
+            data = cache.get(key)
+            if data is None:
+                response = handler(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                data = response.data
+                cache.set(key, data, settings.CATALOGUE_CACHE_TIMEOUT)
+            response = Response(data)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(catalogue['modified'])
+        patch_cache_control(response, no_cache=True)
+        return response
@@ -0,0 +1,46 @@
+import csv
+import json
+
+SHOPPING_CART_TITLE = 'Список покупок.'
+
+
+class Echo:
+    """Буфер для csv.writer, который сразу возвращает строку."""
+
+    def write(self, value):
+        return value
+
+
+def export_txt(ingredients):
+    """Список покупок текстом."""
+    yield f'{SHOPPING_CART_TITLE}\n'
+    for name, measurement_unit, amount in ingredients:
+        yield f'{name} - {measurement_unit} ({amount})\n'
+
+
+def export_csv(ingredients):
+    """Список покупок в CSV."""
+    writer = csv.writer(Echo())
+    yield writer.writerow(('name', 'measurement_unit', 'amount'))
+    for row in ingredients:
+        yield writer.writerow(row)
+
+
+def export_json(ingredients):
+    """Список покупок массивом JSON."""
+    separator = ''
+    yield '['
+    for name, measurement_unit, amount in ingredients:
+        yield separator + json.dumps({'name': name,
+                                      'measurement_unit': measurement_unit,
+                                      'amount': amount},
+                                     ensure_ascii=False)
+        separator = ','
+    yield ']'
+
+
+EXPORT_FORMATS = {
+    'txt': (export_txt, 'text/plain; charset=utf-8'),
+    'csv': (export_csv, 'text/csv; charset=utf-8'),
+    'json': (export_json, 'application/json'),
+}
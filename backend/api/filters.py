@@ -1,6 +1,9 @@
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
 
-from recipes.models import Ingredient, Recipe, Tag
+from recipes.models import (Favorite, Ingredient, Recipe, RecipeTag,
+                            ShoppingCart, Tag)
+from recipes.search import search_recipes
 
 
 class FilterRecipes(FilterSet):
@@ -8,24 +11,38 @@ class FilterRecipes(FilterSet):
 
     tags = filters.ModelMultipleChoiceFilter(queryset=Tag.objects.all(),
                                              to_field_name='slug',
-                                             field_name='tags__slug')
+                                             method='filter_tags')
 
+    search = filters.CharFilter(method='filter_search')
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart')
 
+    def filter_tags(self, queryset, name, value):
+        """Рецепты хотя бы с одним из тегов, без повторов."""
+        if not value:
+            return queryset
+        return queryset.filter(Exists(RecipeTag.objects.filter(
+            recipe=OuterRef('pk'), tag__in=value)))
+
     def filter_is_in_shopping_cart(self, queryset, name, value):
         """Фильтр для покупок."""
         if value and self.request.user.is_authenticated:
-            return queryset.filter(shopping_cart__user=self.request.user)
+            return queryset.filter(Exists(ShoppingCart.objects.filter(
+                user=self.request.user, recipe=OuterRef('pk'))))
         return queryset
 
     def filter_is_favorited(self, queryset, name, value):
         """Фильтр для избранного."""
         if value and self.request.user.is_authenticated:
-            return queryset.filter(favorites__user=self.request.user)
+            return queryset.filter(Exists(Favorite.objects.filter(
+                user=self.request.user, recipe=OuterRef('pk'))))
         return queryset
 
+    def filter_search(self, queryset, name, value):
+        """Полнотекстовый поиск по названию и описанию."""
+        return search_recipes(queryset, value)
+
     class Meta:
         model = Recipe
         fields = ('author', 'tags')
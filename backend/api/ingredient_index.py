@@ -0,0 +1,138 @@
+import heapq
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from constants import (FUZZY_SEARCH_LIMIT, TRIGRAM_SIMILARITY,
+                       TRIGRAM_WORD_SIMILARITY)
+from recipes.models import Ingredient
+
+from .cache import get_catalogue_version
+
+WORDS = re.compile(r'[^\W_]+')
+
+
+def trigrams(text):
+    """Триграммы строки, как их считает pg_trgm."""
+    grams = set()
+    for word in WORDS.findall(text.lower()):
+        word = f'  {word} '
+        grams.update(word[i:i + 3] for i in range(len(word) - 2))
+    return grams
+
+
+class IngredientIndex:
+    """Индекс ингредиентов в памяти процесса, без учёта регистра.
+
+    Перестраивается, когда меняется версия справочников в общем кеше.
+    """
+
+    def __init__(self):
+        """Индекс строится при первом поиске."""
+        self._lock = threading.Lock()
+        self._data = None
+
+    def invalidate(self):
+        """Сбросить индекс, он перестроится при следующем поиске."""
+        with self._lock:
+            self._data = None
+
+    def _build(self, version):
+        rows = sorted(
+            Ingredient.objects.values('id', 'name', 'measurement_unit'),
+            key=lambda row: (row['name'].lower(), row['name'], row['id']))
+        postings = defaultdict(list)
+        sizes = []
+        for position, row in enumerate(rows):
+            grams = trigrams(row['name'])
+            sizes.append(len(grams))
+            for gram in grams:
+                postings[gram].append(position)
+        return (version, [row['name'].lower() for row in rows], rows,
+                dict(postings), sizes)
+
+    def _get(self):
+        version = get_catalogue_version()['version']
+        data = self._data
+        if data is None or data[0] != version:
+            with self._lock:
+                if self._data is None or self._data[0] != version:
+                    self._data = self._build(version)
+                data = self._data
+        return data
+
+    def search(self, name, limit=None):
+        """Сначала ингредиенты с началом name, потом содержащие name."""
+        _, keys, rows, _, _ = self._get()
+        name = name.lower()
+        start = bisect_left(keys, name)
+        end = bisect_left(keys, name + '\U0010ffff', start)
+        result = rows[start:end][:limit]
+        if limit is not None and len(result) >= limit:
+            return result
+        for position, key in enumerate(keys):
+            if start <= position < end or name not in key:
+                continue
+            result.append(rows[position])
+            if len(result) == limit:
+                break
+        return result
+
+    def fuzzy_search(self, name, limit=FUZZY_SEARCH_LIMIT):
+        """Ингредиенты, похожие на name, по общим триграммам.
+
+        Пороги те же, что у операторов % и <% в pg_trgm; вместо
+        word_similarity берётся доля триграмм запроса в названии.
+        """
+        _, keys, rows, postings, sizes = self._get()
+        query = trigrams(name)
+        if not query:
+            return []
+        hits = Counter()
+        for gram in query:
+            hits.update(postings.get(gram, ()))
+        found = []
+        for position, common in hits.items():
+            similarity = common / (len(query) + sizes[position] - common)
+            word_similarity = common / len(query)
+            if (similarity >= TRIGRAM_SIMILARITY
+                    or word_similarity >= TRIGRAM_WORD_SIMILARITY):
+                found.append(
+                    (-word_similarity, -similarity, keys[position], position))
+        return [rows[found_row[-1]]
+                for found_row in heapq.nsmallest(limit, found)]
+
+
+ingredient_index = IngredientIndex()
+
+
+def trigram_search(name, limit=FUZZY_SEARCH_LIMIT):
+    """Нечёткий поиск в PostgreSQL по GIN-индексу pg_trgm."""
+    column = f'lower({Ingredient._meta.db_table}.name)'
+    return list(
+        Ingredient.objects.filter(RawSQL(
+            f'({column} %% lower(%s) OR lower(%s) <%% {column})',
+            (name, name), output_field=BooleanField())
+        ).alias(
+            word_similarity=RawSQL(
+                f'word_similarity(lower(%s), {column})', (name,),
+                output_field=FloatField()),
+            similarity=RawSQL(
+                f'similarity({column}, lower(%s))', (name,),
+                output_field=FloatField()),
+        ).order_by(
+            '-word_similarity', '-similarity', 'name'
+        ).values('id', 'name', 'measurement_unit')[:limit]
+    )
+
+
+def fuzzy_search(name, limit=FUZZY_SEARCH_LIMIT):
+    """Нечёткий поиск: pg_trgm в PostgreSQL, иначе индекс в памяти."""
+    if connection.vendor == 'postgresql':
+        return trigram_search(name, limit)
+    return ingredient_index.fuzzy_search(name, limit)
@@ -0,0 +1,189 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Запрос превысил бюджет SQL-запросов."""
+
+
+class RequestMetrics:
+    """Метрики одного запроса: SQL, сериализация, рендер и общее время."""
+
+    def __init__(self):
+        """Пустые метрики в начале запроса."""
+        self.action = None
+        self.auth = None
+        self.queries = 0
+        self.timings = {'db': 0.0, 'serializer': 0.0, 'render': 0.0}
+        self.started = time.perf_counter()
+        self.render_started = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """Обёртка над выполнением SQL для connection.execute_wrapper."""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.timings['db'] += time.perf_counter() - started
+            self.queries += 1
+
+    @contextmanager
+    def timer(self, name):
+        """Добавляет время выполнения блока к метрике name."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] += time.perf_counter() - started
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self, total):
+        """Значение заголовка Server-Timing."""
+        metrics = [
+            f'db;dur={self.timings["db"] * 1000:.1f};'
+            f'desc="{self.queries} queries"',
+            f'serializer;dur={self.timings["serializer"] * 1000:.1f}',
+            f'render;dur={self.timings["render"] * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ]
+        if self.auth:
+            metrics.append(f'auth;desc="{self.auth}"')
+        return ', '.join(metrics)
+
+    def as_log(self, request, response, total):
+        """Структурированная строка лога."""
+        return json.dumps({
+            'action': self.action,
+            'auth': self.auth,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': self.queries,
+            'db_ms': round(self.timings['db'] * 1000, 1),
+            'serializer_ms': round(self.timings['serializer'] * 1000, 1),
+            'render_ms': round(self.timings['render'] * 1000, 1),
+            'total_ms': round(total * 1000, 1),
+        }, ensure_ascii=False)
+
+
+def get_action_name(view_func, method):
+    """Имя действия вьюсета, например RecipeViewsSet.list."""
+    view_class = getattr(view_func, 'cls', None)
+    actions = getattr(view_func, 'actions', None)
+    if view_class is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    if actions:
+        return f'{view_class.__name__}.{actions.get(method.lower())}'
+    return view_class.__name__
+
+
+class RequestMetricsMiddleware:
+    """Считает SQL-запросы и время обработки каждого запроса.
+
+    Под ASGI запросы к базе считаются во вьюсетах с MetricsViewMixin,
+    в том потоке, где выполняется вьюха.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        """Сохраняем следующий обработчик."""
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        metrics = request.metrics = RequestMetrics()
+        with connection.execute_wrapper(metrics):
+            response = self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = request.metrics = RequestMetrics()
+        response = await self.get_response(request)
+        return self.finish(request, response, metrics)
+
+    def finish(self, request, response, metrics):
+        """Заголовок Server-Timing, лог и проверка бюджета."""
+        total = metrics.total
+        response['Server-Timing'] = metrics.server_timing(total)
+        if random.random() < settings.REQUEST_METRICS_SAMPLE_RATE:
+            logger.info(metrics.as_log(request, response, total))
+        self.check_budget(metrics)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.metrics.action = get_action_name(view_func, request.method)
+
+    def process_template_response(self, request, response):
+        metrics = request.metrics
+        metrics.render_started = time.perf_counter()
+
+        def finish_render(response):
+            metrics.timings['render'] += (
+                time.perf_counter() - metrics.render_started)
+
+        response.add_post_render_callback(finish_render)
+        return response
+
+    @staticmethod
+    def check_budget(metrics):
+        """Проверка бюджета запросов для действия."""
+        budget = settings.QUERY_BUDGETS.get(metrics.action)
+        if budget is None or metrics.queries <= budget:
+            return
+        message = (f'{metrics.action}: {metrics.queries} SQL-запросов '
+                   f'при бюджете {budget}')
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+
+
+class _TimedSerializer:
+    """Сериализатор, у которого замеряется получение data."""
+
+    def __init__(self, serializer, metrics):
+        """Оборачиваем сериализатор."""
+        self._serializer = serializer
+        self._metrics = metrics
+
+    def __getattr__(self, name):
+        return getattr(self._serializer, name)
+
+    @property
+    def data(self):
+        with self._metrics.timer('serializer'):
+            return self._serializer.data
+
+
+class MetricsViewMixin:
+    """Замер времени сериализации во вьюсетах."""
+
+    def dispatch(self, request, *args, **kwargs):
+        metrics = getattr(request, 'metrics', None)
+        if metrics is None or metrics in connection.execute_wrappers:
+            return super().dispatch(request, *args, **kwargs)
+        with connection.execute_wrapper(metrics):
+            return super().dispatch(request, *args, **kwargs)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        metrics = getattr(self.request, 'metrics', None)
+        if metrics is None:
+            return serializer
+        return _TimedSerializer(serializer, metrics)
@@ -1,7 +1,73 @@
-from rest_framework.pagination import PageNumberPagination
+from collections import OrderedDict
+
+from django.db import connections
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+from rest_framework.response import Response
+
+
+def estimate_count(queryset):
+    """Оценка числа строк по статистике планировщика PostgreSQL."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.order_by().query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    return plan[0]['Plan']['Plan Rows']
+
+
+class LimitCursorPagination(CursorPagination):
+    """Курсорная пагинация по -id с параметром limit."""
+
+    ordering = '-id'
+    page_size_query_param = 'limit'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = estimate_count(queryset)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
 
 
 class LimitUserPagination(PageNumberPagination):
-    """Limit вместо значения по-умолчанию."""
+    """Limit вместо значения по-умолчанию.
+
+    С параметром pagination=cursor или cursor включается курсорная
+    пагинация без COUNT(*) и OFFSET. Курсор всегда сортирует по -id,
+    поэтому с параметрами из ordered_query_params, которые задают свой
+    порядок, остаётся постраничная пагинация.
+    """
 
     page_size_query_param = 'limit'
+    cursor_pagination_class = LimitCursorPagination
+    ordered_query_params = ('search',)
+
+    def __init__(self):
+        """Курсорная пагинация выбирается по запросу."""
+        self.cursor_paginator = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.use_cursor(request.query_params):
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def use_cursor(self, params):
+        """Запрошен курсор и порядок выдачи не задан параметрами."""
+        if any(params.get(param) for param in self.ordered_query_params):
+            return False
+        return (params.get('pagination') == 'cursor'
+                or self.cursor_pagination_class.cursor_query_param in params)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,95 @@
+from django.core.files.storage import default_storage
+from django.db.models import BooleanField, Exists, OuterRef, Value
+
+from constants import THUMBNAIL_SIZES
+from recipes.models import IngredientsInRecipe, Tag
+from users.models import Follow, User
+
+RECIPE_FIELDS = ('id', 'name', 'image', 'image_variants', 'text',
+                 'cooking_time', 'author_id', 'is_favorited',
+                 'is_in_shopping_cart')
+AUTHOR_FIELDS = ('username', 'email', 'first_name', 'last_name',
+                 'is_subscribed', 'id')
+TAG_FIELDS = ('id', 'name', 'color', 'slug')
+
+
+def file_url(name, request):
+    """Ссылка на файл из хранилища, как у ImageField в DRF."""
+    if not name:
+        return None
+    url = default_storage.url(name)
+    return request.build_absolute_uri(url) if request else url
+
+
+def thumbnail_urls(variants, request):
+    """Ссылки на уменьшенные копии картинки рецепта."""
+    return {size_name: file_url(variants[size_name], request)
+            for size_name in THUMBNAIL_SIZES if variants.get(size_name)}
+
+
+def recipe_rows(queryset):
+    """Рецепты из queryset with_user_data словарями, без prefetch."""
+    return queryset.prefetch_related(None).values(*RECIPE_FIELDS)
+
+
+def authors(author_ids, user):
+    """Авторы по id с отметкой подписки пользователя."""
+    if user.is_authenticated:
+        is_subscribed = Exists(Follow.objects.filter(
+            user=user, author=OuterRef('pk')))
+    else:
+        is_subscribed = Value(False, output_field=BooleanField())
+    rows = User.objects.filter(pk__in=author_ids).annotate(
+        is_subscribed=is_subscribed).values(*AUTHOR_FIELDS)
+    return {row['id']: {field: row[field] for field in AUTHOR_FIELDS}
+            for row in rows}
+
+
+def tags(recipe_ids):
+    """Теги рецептов в порядке модели Tag."""
+    grouped = {}
+    for row in Tag.objects.filter(recipes__in=recipe_ids).values(
+            'recipes', *TAG_FIELDS):
+        grouped.setdefault(row.pop('recipes'), []).append(row)
+    return grouped
+
+
+def ingredients(recipe_ids):
+    """Ингредиенты рецептов с названием, единицей и количеством."""
+    grouped = {}
+    for recipe_id, *row in IngredientsInRecipe.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by('pk').values_list(
+        'recipe_id', 'ingredient_id', 'ingredient__name',
+        'ingredient__measurement_unit', 'amount'
+    ):
+        grouped.setdefault(recipe_id, []).append(dict(zip(
+            ('id', 'name', 'measurement_unit', 'amount'), row)))
+    return grouped
+
+
+def represent_recipes(rows, request):
+    """Рецепты в том же виде, что отдаёт RecipeSerializer.
+
+    Связи читаются тремя запросами на страницу, словари собираются
+    напрямую, без полей DRF.
+    """
+    rows = list(rows)
+    recipe_ids = [row['id'] for row in rows]
+    recipe_authors = authors({row['author_id'] for row in rows},
+                             request.user)
+    recipe_tags = tags(recipe_ids)
+    recipe_ingredients = ingredients(recipe_ids)
+    return [{
+        'id': row['id'],
+        'tags': recipe_tags.get(row['id'], []),
+        'author': recipe_authors[row['author_id']],
+        'ingredients': recipe_ingredients.get(row['id'], []),
+        'is_favorited': row['is_favorited'],
+        'is_in_shopping_cart': row['is_in_shopping_cart'],
+        'name': row['name'],
+        'image': file_url(row['image'], request),
+        'thumbnails': thumbnail_urls(row['image_variants'], request),
+        'text': row['text'],
+        'cooking_time': row['cooking_time'],
+    } for row in rows]
@@ -0,0 +1,68 @@
+import math
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson is not None:
+    OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+ENCODER = JSONEncoder()
+
+
+def has_non_finite(data):
+    """Есть ли в данных NaN или бесконечность."""
+    if isinstance(data, float):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(has_non_finite(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(has_non_finite(value) for value in data)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON через orjson, если он установлен, иначе как в DRF.
+
+    Всё, что orjson не знает сам (Decimal, даты, ленивые строки),
+    отдаётся кодировщику DRF, поэтому вывод совпадает с JSONRenderer:
+    UTC-время с Z, Decimal числом, ленивые строки строками. orjson
+    пишет NaN и бесконечность как null, поэтому при null в выводе
+    данные проверяются и, как в строгом JSONRenderer, падает ValueError.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (orjson is None or data is None or self.ensure_ascii
+                or not self.compact or not self.strict
+                or self.get_indent(accepted_media_type,
+                                   renderer_context or {})):
+            return super().render(data, accepted_media_type,
+                                  renderer_context)
+        content = orjson.dumps(data, default=ENCODER.default,
+                               option=OPTIONS)
+        if b'null' in content and has_non_finite(data):
+            raise ValueError('Out of range float values are not JSON '
+                             'compliant')
+        return content.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+            b'\xe2\x80\xa9', b'\\u2029')
+
+
+class FastJSONParser(JSONParser):
+    """Разбор JSON через orjson, если он установлен, иначе как в DRF."""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get(
+            'encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower() not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -1,4 +1,6 @@
-from django.shortcuts import get_object_or_404
+from collections import Counter
+
+from django.db import transaction
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers, status
@@ -6,12 +8,56 @@ from rest_framework.exceptions import ValidationError
 from rest_framework.fields import IntegerField, SerializerMethodField
 from rest_framework.validators import UniqueTogetherValidator
 
-from constants import MINIMUM_INGREDIENTS
+from constants import BATCH_MAX_SIZE, MINIMUM_INGREDIENTS
+from recipes import shopping_list
 from recipes.models import (ShoppingCart, Favorite, Ingredient,
                             IngredientsInRecipe,
                             Recipe, Tag)
 from users.models import Follow, User
 
+from .recipe_rows import thumbnail_urls
+
+
+def id_errors(model, ids, repeated_message, missing_message):
+    """Повторы и несуществующие id, один запрос IN на все id."""
+    errors = []
+    counts = Counter(ids)
+    repeated = sorted(pk for pk, count in counts.items() if count > 1)
+    if repeated:
+        errors.append(f'{repeated_message}: {repeated}')
+    missing = sorted(set(counts) - set(
+        model.objects.filter(pk__in=counts).values_list('pk', flat=True)))
+    if missing:
+        errors.append(f'{missing_message} с id {missing}')
+    return errors
+
+
+def ingredient_errors(ingredients):
+    """Все ошибки ингредиентов: количество, повторы и несуществующие id."""
+    if not ingredients:
+        return ['Нет ингредиентов, не из чего готовить!']
+    errors = []
+    wrong_amount = sorted({ingredient['id'] for ingredient in ingredients
+                           if ingredient['amount'] < MINIMUM_INGREDIENTS})
+    if wrong_amount:
+        errors.append(f'не правильное значение количества у ингредиентов '
+                      f'с id {wrong_amount}')
+    return errors + id_errors(
+        Ingredient, [ingredient['id'] for ingredient in ingredients],
+        'Ингредиенты не должны повторяться', 'Нет ингредиентов')
+
+
+class ThumbnailsField(serializers.Field):
+    """Ссылки на уменьшенные копии картинки рецепта."""
+
+    def __init__(self, **kwargs):
+        """Поле только для чтения из image_variants."""
+        kwargs.update(source='image_variants', read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, variants):
+        return thumbnail_urls(variants, self.context.get('request'))
+
 
 class CustomUserSerializer(UserSerializer):
     """Сериализатор пользователя."""
@@ -20,6 +66,8 @@ class CustomUserSerializer(UserSerializer):
 
     def get_is_subscribed(self, obj):
         """Получение значения подписки."""
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context.get('request').user
         return (user.is_authenticated
                 and obj.following.filter(user=user).exists())
@@ -55,6 +103,22 @@ class IngredientSerializer(serializers.ModelSerializer):
         fields = ('id', 'name', 'measurement_unit')
 
 
+class IngredientSearchSerializer(serializers.Serializer):
+    """Параметры поиска ингредиентов."""
+
+    name = serializers.CharField()
+    limit = serializers.IntegerField(min_value=1, required=False)
+    fuzzy = serializers.BooleanField(default=False)
+
+
+class BatchIdsSerializer(serializers.Serializer):
+    """Пачка id для пакетных операций."""
+
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False, max_length=BATCH_MAX_SIZE)
+
+
 class TagSerializer(serializers.ModelSerializer):
     """Сериализатор тэгов."""
 
@@ -83,11 +147,16 @@ class IngredientsInRecipeSerializer(serializers.ModelSerializer):
         ]
 
 
+class RecipesLimitSerializer(serializers.Serializer):
+    """Параметр recipes_limit."""
+
+    recipes_limit = serializers.IntegerField(min_value=0, required=False)
+
+
 class SubscribeUserSerializer(CustomUserSerializer):
     """Сериализатор подписок."""
 
     recipes = SerializerMethodField()
-    recipes_count = SerializerMethodField()
 
     class Meta(CustomUserSerializer.Meta):
         fields = ('last_name', 'is_subscribed', 'id',
@@ -97,22 +166,17 @@ class SubscribeUserSerializer(CustomUserSerializer):
 
     def get_recipes(self, data):
         """Получение рецептов автора."""
-        recipes = data.recipes.all()
-        request = self.context.get('request')
-        recipes_limit = request.GET.get('recipes_limit')
-        if recipes_limit:
-            try:
-                recipes = recipes[:int(recipes_limit)]
-            except Exception:
-                pass
+        if hasattr(data, 'limited_recipes'):
+            recipes = data.limited_recipes
+        else:
+            recipes = data.recipes.all()
+            recipes_limit = self.context.get('recipes_limit')
+            if recipes_limit is not None:
+                recipes = recipes[:recipes_limit]
         serializer = BaseRecipeSerializer(recipes, many=True,
                                           read_only=True)
         return serializer.data
 
-    def get_recipes_count(self, obj):
-        """Количество рецептов автора."""
-        return obj.recipes.count()
-
 
 class RecipeSerializer(serializers.ModelSerializer):
     """Сериализатор рецептов."""
@@ -126,15 +190,20 @@ class RecipeSerializer(serializers.ModelSerializer):
         many=True,
         source='ingredients_in_recipe',
     )
+    thumbnails = ThumbnailsField()
 
     def get_is_favorited(self, obj):
         """Добавлен ли рецепт избранное."""
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         user = self.context.get('request').user
         return user.is_authenticated and user.favorites.filter(
             recipe=obj).exists()
 
     def get_is_in_shopping_cart(self, obj):
         """Получаем значение, добавлен ли рецепт в корзину."""
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         user = self.context.get('request').user
         return user.is_authenticated and user.shopping_cart.filter(
             recipe=obj).exists()
@@ -143,13 +212,14 @@ class RecipeSerializer(serializers.ModelSerializer):
         model = Recipe
         fields = ('id', 'tags', 'author', 'ingredients',
                   'is_favorited', 'is_in_shopping_cart', 'name',
-                  'image', 'text', 'cooking_time')
+                  'image', 'thumbnails', 'text', 'cooking_time')
 
 
 class IngredientsinRecipeSerializerPost(serializers.ModelSerializer):
     """Сериализатор игредиентов при пост запросах."""
 
     id = IntegerField(write_only=True)
+    amount = IntegerField()
 
     class Meta:
         model = IngredientsInRecipe
@@ -159,8 +229,7 @@ class IngredientsinRecipeSerializerPost(serializers.ModelSerializer):
 class RecipesSerializerPost(serializers.ModelSerializer):
     """Сериализатор при пост запросах."""
 
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True)
+    tags = serializers.ListField(child=IntegerField())
     image = Base64ImageField()
     author = CustomUserSerializer(read_only=True)
     ingredients = IngredientsinRecipeSerializerPost(many=True)
@@ -171,30 +240,28 @@ class RecipesSerializerPost(serializers.ModelSerializer):
                   'name', 'text', 'cooking_time', 'author')
 
     def validate(self, data):
-        """Валидация данных."""
-        list_of_ingredients = []
-        ingredients = self.initial_data.get('ingredients')
-        if not ingredients:
-            raise serializers.ValidationError('Нет ингредиентов, '
-                                              'не из чего готовить!')
-        for ingredient in ingredients:
-
-            value = get_object_or_404(Ingredient, id=ingredient['id'])
-            if ingredient['amount'] < MINIMUM_INGREDIENTS:
-                raise ValidationError('не правильное значение')
-            if value in list_of_ingredients:
-                raise ValidationError('Ингредиенты не должны повторяться')
-            list_of_ingredients.append(value)
-
-        tags = self.initial_data.get('tags')
-        list_of_tags = []
-        if not tags:
-            raise ValidationError('Ингредиент не заполнено')
-        for tag in tags:
-            if tag in list_of_tags:
-                raise ValidationError('Тег не должен повторяться')
-            list_of_tags.append(tag)
-
+        """Валидация данных: по одному запросу на ингредиенты и теги.
+
+        Количество ингредиентов проверяется здесь же, а не в поле,
+        чтобы все ошибки пришли одним ответом. При частичном
+        обновлении не переданные связи не проверяются.
+        """
+        errors = {}
+        if not self.partial or 'ingredients' in data:
+            ingredient_list = ingredient_errors(data.get('ingredients'))
+            if ingredient_list:
+                errors['ingredients'] = ingredient_list
+        if not self.partial or 'tags' in data:
+            tags = data.get('tags')
+            if tags:
+                tag_errors = id_errors(Tag, tags, 'Тег не должен повторяться',
+                                       'Нет тегов')
+            else:
+                tag_errors = ['Нужен хотя бы один тег']
+            if tag_errors:
+                errors['tags'] = tag_errors
+        if errors:
+            raise ValidationError(errors)
         return data
 
     def validate_image(self, image):
@@ -215,17 +282,56 @@ class RecipesSerializerPost(serializers.ModelSerializer):
         IngredientsInRecipe.objects.bulk_create(recipe_ingredients)
 
     def update(self, instance, validated_data):
-        """Обновление пецепта."""
-        tags = validated_data.pop('tags')
-        instance.tags.clear()
-        instance.tags.set(tags)
-        ingredients = validated_data.pop('ingredients')
-        instance = super().update(instance, validated_data)
-        instance.ingredients.clear()
-        self.cooking_ingredients(ingredients, instance)
-        instance.save()
+        """Обновление пецепта: меняются только изменившиеся связи."""
+        tags = validated_data.pop('tags', None)
+        ingredients = validated_data.pop('ingredients', None)
+        with transaction.atomic():
+            instance = super().update(instance, validated_data)
+            if tags is not None:
+                self.update_tags(instance, tags)
+            if ingredients is not None:
+                self.update_ingredients(instance, ingredients)
         return instance
 
+    @staticmethod
+    def update_tags(recipe, tags):
+        """Добавить новые и убрать лишние теги рецепта."""
+        current = set(recipe.tags.values_list('pk', flat=True))
+        new = set(tags)
+        if current - new:
+            recipe.tags.remove(*(current - new))
+        if new - current:
+            recipe.tags.add(*(new - current))
+
+    @staticmethod
+    def update_ingredients(recipe, ingredients):
+        """Вставки, изменения и удаления только по разнице с базой."""
+        amounts = {ingredient['id']: ingredient['amount']
+                   for ingredient in ingredients}
+        deltas = {}
+        removed = []
+        changed = []
+        for item in recipe.ingredients_in_recipe.all():
+            amount = amounts.pop(item.ingredient_id, None)
+            if amount is None:
+                removed.append(item.pk)
+                deltas[item.ingredient_id] = -item.amount
+            elif amount != item.amount:
+                deltas[item.ingredient_id] = amount - item.amount
+                item.amount = amount
+                changed.append(item)
+        if removed:
+            IngredientsInRecipe.objects.filter(pk__in=removed).delete()
+        if changed:
+            IngredientsInRecipe.objects.bulk_update(changed, ('amount',))
+        if amounts:
+            IngredientsInRecipe.objects.bulk_create(
+                IngredientsInRecipe(recipe=recipe, ingredient_id=ingredient_id,
+                                    amount=amount)
+                for ingredient_id, amount in amounts.items())
+            deltas.update(amounts)
+        shopping_list.change_recipe(recipe, deltas)
+
     def create(self, validated_data):
         """Создание рецепта."""
         ingredients = validated_data.pop('ingredients')
@@ -247,9 +353,11 @@ class RecipesSerializerPost(serializers.ModelSerializer):
 class BaseRecipeSerializer(serializers.ModelSerializer):
     """Сериализатор добавления рецепта в корзину."""
 
+    thumbnails = ThumbnailsField()
+
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'thumbnails', 'cooking_time')
 
 
 class FollowSerializerPost(serializers.ModelSerializer):
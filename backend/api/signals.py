@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Tag
+from users.models import User
+
+from .authentication import invalidate_token, invalidate_user_tokens
+from .cache import bump_catalogue_version
+from .ingredient_index import ingredient_index
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_save, sender=Tag)
+@receiver(post_delete, sender=Tag)
+def bump_catalogue(sender, **kwargs):
+    """Справочники изменились: новая версия кеша и индекса."""
+    bump_catalogue_version()
+    if sender is Ingredient:
+        ingredient_index.invalidate()
+
+
+@receiver(post_delete, sender=Token)
+def forget_token(sender, instance, **kwargs):
+    """Выход: токен удалён."""
+    invalidate_token(instance.key)
+
+
+@receiver(post_save, sender=User)
+def forget_user_tokens(sender, instance, created, **kwargs):
+    """Смена пароля, деактивация и другие изменения пользователя."""
+    if not created:
+        invalidate_user_tokens([instance.pk])
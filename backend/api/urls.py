@@ -1,7 +1,9 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from . import views
+from .async_views import offload
 
 app_name = 'api'
 router = DefaultRouter()
@@ -14,6 +16,17 @@ router.register('recipes',
                 views.RecipeViewsSet, basename='recipes')
 router.register('ingredients',
                 views.IngredientsViewsSet, basename='ingredients')
+ASYNC_ROUTES = {
+    'tags-list', 'tags-detail',
+    'ingredients-list', 'ingredients-detail',
+    'recipes-list', 'recipes-detail', 'recipes-feed',
+    'users-subscriptions',
+}
+if settings.ASYNC_VIEWS:
+    for pattern in router.urls:
+        if pattern.name in ASYNC_ROUTES:
+            pattern.callback = offload(pattern.callback)
+
 urlpatterns = [
     path('', include(router.urls)),
     path('', include('djoser.urls')),
@@ -1,31 +1,44 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from contextlib import nullcontext
+
+from django.db.models import (BooleanField, OuterRef, Prefetch, Subquery,
+                              Value)
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
 from rest_framework.filters import SearchFilter
+from rest_framework.generics import get_object_or_404 as get_row_or_404
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
+from constants import SHOPPING_CART_CHUNK_SIZE
+from recipes.feed import feed_recipes
 from recipes.models import (ShoppingCart, Favorite, Ingredient,
-                            IngredientsInRecipe,
-                            Recipe, Tag)
+                            Recipe, ShoppingListItem, Tag)
 from users.models import Follow, User
-from .filters import FilterSearchForName, FilterRecipes
 
+from . import batch
+from .cache import CatalogueCacheMixin
+from .exporters import EXPORT_FORMATS
+from .filters import FilterSearchForName, FilterRecipes
+from .ingredient_index import fuzzy_search, ingredient_index
+from .metrics import MetricsViewMixin
 from .pagination import LimitUserPagination
 from .permission import AuthorOrReadOnly
+from .recipe_rows import recipe_rows, represent_recipes
 from .serializers import (ShoppingCartSerializer, CustomUserSerializer,
-                          FavoriteSerializer, IngredientSerializer,
+                          FavoriteSerializer, IngredientSearchSerializer,
+                          IngredientSerializer,
                           RecipesSerializerPost, FollowSerializerPost,
-                          RecipeSerializer, SubscribeUserSerializer,
+                          RecipeSerializer, RecipesLimitSerializer,
+                          SubscribeUserSerializer,
                           TagSerializer)
 
 
-class CustomUserViewSet(UserViewSet):
+class CustomUserViewSet(MetricsViewMixin, UserViewSet):
     """Вью юсеров."""
 
     queryset = User.objects.all()
@@ -41,6 +54,12 @@ class CustomUserViewSet(UserViewSet):
             return [IsAuthenticated(), ]
         return [AuthorOrReadOnly(), ]
 
+    def get_recipes_limit(self):
+        """Проверенный параметр recipes_limit."""
+        params = RecipesLimitSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        return params.validated_data.get('recipes_limit')
+
     @action(methods=['post', 'delete'],
             permission_classes=(IsAuthenticated,),
             detail=True)
@@ -50,8 +69,9 @@ class CustomUserViewSet(UserViewSet):
         if request.method == 'POST':
             user = request.user
             data = {'user': user.id, 'author': id}
-            serializer = FollowSerializerPost(data=data,
-                                              context={'request': request})
+            context = {'request': request,
+                       'recipes_limit': self.get_recipes_limit()}
+            serializer = FollowSerializerPost(data=data, context=context)
             serializer.is_valid(raise_exception=True)
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
@@ -66,19 +86,40 @@ class CustomUserViewSet(UserViewSet):
             return Response({'Ошибка': 'Неправильные данные'},
                             status=status.HTTP_400_BAD_REQUEST)
 
+    @action(methods=['post', 'delete'],
+            permission_classes=(IsAuthenticated,),
+            detail=False, url_path='batch/subscribe')
+    def batch_subscribe(self, request):
+        """Подписка и отписка на несколько авторов."""
+        return batch.batch_response(batch.subscriptions, request,
+                                    forbidden={request.user.pk})
+
     @action(methods=['get'],
             permission_classes=(IsAuthenticated,),
             detail=False, )
     def subscriptions(self, request):
         """Все подписки пользователя."""
-        page = self.paginate_queryset(User.objects.filter(
-            following__user=request.user))
+        recipes_limit = self.get_recipes_limit()
+        recipes = Recipe.objects.only('id', 'name', 'image', 'image_variants',
+                                      'cooking_time', 'author_id')
+        if recipes_limit is not None:
+            recipes = recipes.filter(pk__in=Subquery(Recipe.objects.filter(
+                author=OuterRef('author')).values('pk')[:recipes_limit]))
+        authors = User.objects.filter(
+            following__user=request.user
+        ).annotate(
+            is_subscribed=Value(True, output_field=BooleanField())
+        ).prefetch_related(
+            Prefetch('recipes', queryset=recipes, to_attr='limited_recipes')
+        )
+        page = self.paginate_queryset(authors)
         serializer = SubscribeUserSerializer(page, many=True,
                                              context={'request': request})
         return self.get_paginated_response(serializer.data)
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(MetricsViewMixin, CatalogueCacheMixin,
+                 viewsets.ReadOnlyModelViewSet):
     """Вью тегов."""
 
     queryset = Tag.objects.all()
@@ -86,7 +127,8 @@ class TagViewSet(viewsets.ReadOnlyModelViewSet):
     pagination_class = None
 
 
-class IngredientsViewsSet(viewsets.ReadOnlyModelViewSet):
+class IngredientsViewsSet(MetricsViewMixin, CatalogueCacheMixin,
+                          viewsets.ReadOnlyModelViewSet):
     """Вью ингредиентов."""
 
     queryset = Ingredient.objects.all()
@@ -96,8 +138,18 @@ class IngredientsViewsSet(viewsets.ReadOnlyModelViewSet):
     search_fields = ('^name',)
     filterset_class = FilterSearchForName
 
+    def list(self, request, *args, **kwargs):
+        """Поиск по имени идёт через индекс, с fuzzy=1 нечёткий."""
+        if not request.query_params.get('name'):
+            return super().list(request, *args, **kwargs)
+        params = IngredientSearchSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        if params.validated_data.pop('fuzzy'):
+            return Response(fuzzy_search(**params.validated_data))
+        return Response(ingredient_index.search(**params.validated_data))
+
 
-class RecipeViewsSet(ModelViewSet):
+class RecipeViewsSet(MetricsViewMixin, ModelViewSet):
     """Вью рецептов."""
 
     queryset = Recipe.objects.all()
@@ -106,12 +158,42 @@ class RecipeViewsSet(ModelViewSet):
     filterset_class = FilterRecipes
     pagination_class = LimitUserPagination
 
+    def get_queryset(self):
+        """Связи и отметки пользователя для чтения рецептов."""
+        if self.action == 'feed':
+            return feed_recipes(self.request.user).with_user_data(
+                self.request.user)
+        if self.action in ('list', 'retrieve'):
+            return self.queryset.with_user_data(self.request.user)
+        return self.queryset
+
     def get_serializer_class(self):
         """Выбор серилизатора."""
         if self.request.method == 'PATCH' or self.request.method == 'POST':
             return RecipesSerializerPost
         return RecipeSerializer
 
+    def represent(self, rows):
+        """Рецепты словарями в формате RecipeSerializer."""
+        metrics = getattr(self.request, 'metrics', None)
+        with metrics.timer('serializer') if metrics else nullcontext():
+            return represent_recipes(rows, self.request)
+
+    def list(self, request, *args, **kwargs):
+        """Список рецептов без ModelSerializer, из values()."""
+        queryset = recipe_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return Response(self.represent(queryset))
+        return self.get_paginated_response(self.represent(page))
+
+    def retrieve(self, request, *args, **kwargs):
+        """Рецепт без ModelSerializer, из values()."""
+        row = get_row_or_404(
+            recipe_rows(self.filter_queryset(self.get_queryset())),
+            pk=kwargs['pk'])
+        return Response(self.represent([row])[0])
+
     def perform_create(self, serializer):
         """Создание рецепта."""
         serializer.save(author=self.request.user)
@@ -165,27 +247,55 @@ class RecipeViewsSet(ModelViewSet):
         get_object_or_404(Recipe, id=pk)
         return Response(status=status.HTTP_400_BAD_REQUEST)
 
+    @action(methods=['get'],
+            permission_classes=[IsAuthenticated],
+            detail=False)
+    def feed(self, request):
+        """Рецепты авторов, на которых подписан пользователь."""
+        return self.list(request)
+
+    @action(methods=['post', 'delete'],
+            permission_classes=[IsAuthenticated],
+            detail=False, url_path='batch/favorite')
+    def batch_favorite(self, request):
+        """Добавление/удаление нескольких рецептов в избранное."""
+        return batch.batch_response(batch.favorites, request)
+
+    @action(methods=['post', 'delete'],
+            permission_classes=[IsAuthenticated],
+            detail=False, url_path='batch/shopping_cart')
+    def batch_shopping_cart(self, request):
+        """Добавление/удаление нескольких рецептов в корзину."""
+        return batch.batch_response(batch.shopping_cart, request)
+
+    def perform_content_negotiation(self, request, force=False):
+        """Параметр format у скачивания корзины выбирает формат файла."""
+        if self.action == 'download_shopping_cart':
+            force = True
+        return super().perform_content_negotiation(request, force)
+
     @action(methods=['get'],
             permission_classes=[IsAuthenticated],
             detail=False)
     def download_shopping_cart(self, request):
         """Скачивание рецепта."""
+        export_format = request.query_params.get('format', 'txt')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'format': f'Доступные форматы: {", ".join(EXPORT_FORMATS)}'},
+                status=status.HTTP_400_BAD_REQUEST)
         if request.user.shopping_cart.exists():
-            ingredients_recipe = IngredientsInRecipe.objects.filter(
-                recipe__shopping_cart__user=request.user)
-            values = ingredients_recipe.values('ingredient__name',
-                                               'ingredient__measurement_unit')
-            ingredients = values.annotate(amount=Sum('amount'))
-
-            shop_cart = 'Список покупок.\n'
-            for ingredient in ingredients:
-                shop_cart += (f'{ingredient["ingredient__name"]} - '
-                              f'{ingredient["ingredient__measurement_unit"]} '
-                              f'({ingredient["amount"]})\n')
-
-            filename = 'Покупоки.txt'
-            response = HttpResponse(shop_cart,
-                                    content_type='text/plain')
+            ingredients = ShoppingListItem.objects.filter(
+                user=request.user
+            ).values_list(
+                'ingredient__name', 'ingredient__measurement_unit',
+                'total_amount'
+            ).order_by('ingredient__name')
+            export, content_type = EXPORT_FORMATS[export_format]
+            response = StreamingHttpResponse(
+                export(ingredients.iterator(SHOPPING_CART_CHUNK_SIZE)),
+                content_type=content_type)
+            filename = f'Покупоки.{export_format}'
             response['Content-Disposition'] = (f'attachment; '
                                                f'filename={filename}')
             return response
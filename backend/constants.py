@@ -5,3 +5,15 @@ MAX_LENGHT_TEXT = 1000
 MINIMUM_INGREDIENTS = 1
 MIN_TIME = 0
 MAX_TIME = 1000
+SHOPPING_CART_CHUNK_SIZE = 500
+THUMBNAIL_DIR = 'recipes/thumbs/'
+THUMBNAIL_FORMAT = 'WEBP'
+THUMBNAIL_SIZES = {'small': 320, 'medium': 640, 'large': 1280}
+FUZZY_SEARCH_LIMIT = 20
+TRIGRAM_SIMILARITY = 0.3
+TRIGRAM_WORD_SIMILARITY = 0.6
+BATCH_MAX_SIZE = 100
+FEED_TIMELINE_SIZE = 1000
+FEED_TIMELINE_SLACK = 100
+FEED_FANOUT_LIMIT = 10000
+FEED_BATCH_SIZE = 1000
@@ -1,5 +1,8 @@
 from django.contrib import admin
 
+from .admin_filters import (AuthorEmailFilter, EstimatedCountPaginator,
+                            IngredientNameFilter, RecipeNameFilter,
+                            UserEmailFilter)
 from .models import (ShoppingCart, Favorite, Ingredient, IngredientsInRecipe,
                      Recipe, Tag)
 
@@ -19,15 +22,22 @@ class RecipesAdmin(admin.ModelAdmin):
     list_display = ('id', 'author_name', 'name', 'text',
                     'cooking_time', 'recipes_tags', 'recipes_ingredients',
                     'favorite_count')
-    list_filter = ('author', 'tags', 'name')
-    search_fields = ('name', 'cooking_time', 'tags__name',
-                     'author__email', 'ingredients__name')
+    list_filter = (AuthorEmailFilter, 'tags', IngredientNameFilter)
+    search_fields = ('name',)
+    autocomplete_fields = ('author',)
     inlines = (RecipeIngredientAdmin,)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
-    @admin.display(description='отметок в избраном')
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(
+            'author').prefetch_related('tags', 'ingredients')
+
+    @admin.display(description='отметок в избраном',
+                   ordering='favorites_count')
     def favorite_count(self, obj):
         """Отметоки в избраном у рецепта."""
-        return obj.favorites.count()
+        return obj.favorites_count
 
     @admin.display(description='Автор')
     def author_name(self, obj):
@@ -51,6 +61,7 @@ class ShoppingCartAdmin(admin.ModelAdmin):
     """Админ корзины."""
 
     list_display = ('id', 'get_recipe', 'get_user',)
+    list_select_related = ('user', 'recipe')
     search_fields = ('user__email', 'recipe__name')
 
     def get_queryset(self, request):
@@ -71,8 +82,12 @@ class FavoriteAdmin(admin.ModelAdmin):
     """Админ Избранного."""
 
     list_display = ('user', 'recipe')
-    search_fields = ('user', 'recipe')
-    list_filter = ('user',)
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__email', 'recipe__name')
+    list_filter = (UserEmailFilter, RecipeNameFilter)
+    autocomplete_fields = ('user', 'recipe')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Ingredient)
@@ -81,7 +96,7 @@ class IngredientAdmin(admin.ModelAdmin):
 
     list_display = ('id', 'name', 'measurement_unit')
     search_fields = ('id', 'name', 'measurement_unit')
-    list_filter = ('name',)
+    list_filter = ('measurement_unit',)
 
 
 @admin.register(Tag)
@@ -0,0 +1,86 @@
+from django.contrib import admin
+from django.core.paginator import Paginator
+from django.db.models import Exists, OuterRef
+from django.utils.functional import cached_property
+
+from api.pagination import estimate_count
+
+from .models import IngredientsInRecipe
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор админки с оценкой числа строк вместо COUNT(*).
+
+    На PostgreSQL число строк берётся из плана запроса, на остальных
+    базах считается обычным COUNT(*).
+    """
+
+    @cached_property
+    def count(self):
+        """Оценка числа строк."""
+        estimate = estimate_count(self.object_list)
+        if estimate is None:
+            return super().count
+        return estimate
+
+
+class InputFilter(admin.SimpleListFilter):
+    """Фильтр с полем ввода вместо списка всех значений."""
+
+    template = 'admin/input_filter.html'
+    lookup = None
+
+    def lookups(self, request, model_admin):
+        return ((None, None),)
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.lookup: self.value().strip()})
+        return queryset
+
+    def choices(self, changelist):
+        all_choice = next(super().choices(changelist))
+        all_choice['query_parts'] = (
+            (key, value)
+            for key, value in changelist.get_filters_params().items()
+            if key != self.parameter_name
+        )
+        yield all_choice
+
+
+class UserEmailFilter(InputFilter):
+    """Фильтр по почте пользователя."""
+
+    title = 'почте пользователя'
+    parameter_name = 'user_email'
+    lookup = 'user__email__iexact'
+
+
+class AuthorEmailFilter(InputFilter):
+    """Фильтр по почте автора."""
+
+    title = 'почте автора'
+    parameter_name = 'author_email'
+    lookup = 'author__email__iexact'
+
+
+class RecipeNameFilter(InputFilter):
+    """Фильтр по названию рецепта."""
+
+    title = 'названию рецепта'
+    parameter_name = 'recipe_name'
+    lookup = 'recipe__name__istartswith'
+
+
+class IngredientNameFilter(InputFilter):
+    """Рецепты с ингредиентом, подзапрос EXISTS вместо JOIN."""
+
+    title = 'ингредиенту'
+    parameter_name = 'ingredient'
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return queryset
+        return queryset.filter(Exists(IngredientsInRecipe.objects.filter(
+            recipe=OuterRef('pk'),
+            ingredient__name__iexact=self.value().strip())))
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
+
+    def ready(self):
+        from . import indexes, search, signals  # noqa: F401
+        post_migrate.connect(search.install_index, sender=self)
+        post_migrate.connect(indexes.install_indexes, sender=self)
@@ -0,0 +1,45 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from users.models import Follow, User
+
+from .models import Favorite, Recipe
+
+COUNTERS = {
+    'favorites_count': (Recipe, Favorite, 'recipe'),
+    'recipes_count': (User, Recipe, 'author'),
+    'followers_count': (User, Follow, 'author'),
+}
+
+
+def change(counter, ids, delta):
+    """Атомарно изменить счётчик counter на delta у объектов ids."""
+    model, _, _ = COUNTERS[counter]
+    model.objects.filter(pk__in=ids).update(**{counter: F(counter) + delta})
+
+
+def live_count(counter):
+    """Подзапрос с настоящим значением счётчика."""
+    _, related_model, field = COUNTERS[counter]
+    return Coalesce(Subquery(
+        related_model.objects.filter(
+            **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(count=Count('pk')).values('count')
+    ), Value(0))
+
+
+def drift(counter):
+    """Объекты, у которых счётчик разошёлся с данными."""
+    model, _, _ = COUNTERS[counter]
+    return model.objects.annotate(
+        live=live_count(counter)).exclude(**{counter: F('live')})
+
+
+def reconcile(counter):
+    """Пересчитать счётчик, вернуть число исправленных объектов."""
+    model, _, _ = COUNTERS[counter]
+    broken = list(drift(counter).values_list('pk', flat=True))
+    if broken:
+        model.objects.filter(pk__in=broken).update(
+            **{counter: live_count(counter)})
+    return len(broken)
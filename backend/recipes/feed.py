@@ -0,0 +1,102 @@
+from itertools import groupby, islice
+from operator import itemgetter
+
+from django.db.models import Count, Q
+
+from constants import (FEED_BATCH_SIZE, FEED_FANOUT_LIMIT, FEED_TIMELINE_SIZE,
+                       FEED_TIMELINE_SLACK)
+from users.models import Follow
+
+from .models import Recipe, TimelineEntry
+
+
+def fan_out(recipe):
+    """Новый рецепт попадает в ленты подписчиков автора.
+
+    У авторов с числом подписчиков больше FEED_FANOUT_LIMIT рецепты
+    в ленты не пишутся, они подмешиваются при чтении. Ленты, которые
+    переросли FEED_TIMELINE_SIZE больше чем на FEED_TIMELINE_SLACK
+    записей, обрезаются сразу.
+    """
+    followers = Follow.objects.filter(
+        author_id=recipe.author_id,
+        author__followers_count__lte=FEED_FANOUT_LIMIT,
+    ).values_list('user_id', flat=True).iterator(FEED_BATCH_SIZE)
+    for batch in iter(lambda: list(islice(followers, FEED_BATCH_SIZE)), []):
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user_id=user_id, recipe_id=recipe.pk)
+             for user_id in batch],
+            ignore_conflicts=True)
+        trim(batch, slack=FEED_TIMELINE_SLACK)
+
+
+def follow(user_id, author_ids):
+    """Последние рецепты новых авторов попадают в ленту."""
+    recipe_ids = Recipe.objects.filter(
+        author_id__in=author_ids,
+        author__followers_count__lte=FEED_FANOUT_LIMIT,
+    ).order_by('-id').values_list('pk', flat=True)[:FEED_TIMELINE_SIZE]
+    TimelineEntry.objects.bulk_create(
+        [TimelineEntry(user_id=user_id, recipe_id=recipe_id)
+         for recipe_id in recipe_ids],
+        ignore_conflicts=True)
+
+
+def unfollow(user_id, author_ids):
+    """Рецепты авторов убираются из ленты отписавшегося."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, recipe__author_id__in=author_ids).delete()
+
+
+def feed_recipes(user):
+    """Лента: последние записи таймлайна и рецепты популярных авторов."""
+    timeline = TimelineEntry.objects.filter(
+        user=user
+    ).order_by('-recipe_id').values('recipe_id')[:FEED_TIMELINE_SIZE]
+    popular = Follow.objects.filter(
+        user=user, author__followers_count__gt=FEED_FANOUT_LIMIT
+    ).values('author_id')
+    return Recipe.objects.filter(
+        Q(pk__in=timeline) | Q(author_id__in=popular))
+
+
+def followed_recipes(user):
+    """Лента без таймлайна: все рецепты авторов из подписок."""
+    return Recipe.objects.filter(author__following__user=user)
+
+
+def trim(user_ids=None, slack=0):
+    """Оставить в лентах FEED_TIMELINE_SIZE последних записей.
+
+    Ленты, которые выросли не больше чем на slack записей сверх
+    размера, не трогаются.
+    """
+    entries = TimelineEntry.objects.all()
+    if user_ids is not None:
+        entries = entries.filter(user_id__in=user_ids)
+    overflowing = list(entries.values('user_id').annotate(
+        total=Count('pk')
+    ).filter(total__gt=FEED_TIMELINE_SIZE + slack).values_list(
+        'user_id', flat=True))
+    deleted = 0
+    for user_id in overflowing:
+        oldest_kept = TimelineEntry.objects.filter(
+            user_id=user_id
+        ).order_by('-recipe_id').values_list(
+            'recipe_id', flat=True)[FEED_TIMELINE_SIZE - 1]
+        deleted += TimelineEntry.objects.filter(
+            user_id=user_id, recipe_id__lt=oldest_kept).delete()[0]
+    return deleted
+
+
+def rebuild(users):
+    """Пересборка лент пользователей из queryset по их подпискам."""
+    TimelineEntry.objects.filter(user__in=users).delete()
+    follows = Follow.objects.filter(user__in=users).order_by(
+        'user_id').values_list('user_id', 'author_id')
+    rebuilt = 0
+    for user_id, pairs in groupby(follows.iterator(FEED_BATCH_SIZE),
+                                  key=itemgetter(0)):
+        follow(user_id, [author_id for _, author_id in pairs])
+        rebuilt += 1
+    return rebuilt
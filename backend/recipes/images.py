@@ -0,0 +1,85 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from constants import THUMBNAIL_DIR, THUMBNAIL_FORMAT, THUMBNAIL_SIZES
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def get_executor():
+    """Пул потоков для обработки картинок, создаётся в каждом процессе."""
+    return ThreadPoolExecutor(max_workers=settings.IMAGE_WORKERS,
+                              thread_name_prefix='recipe-images')
+
+
+def thumbnail_name(image_name, size_name):
+    """Путь уменьшенной копии картинки."""
+    stem = os.path.splitext(os.path.basename(image_name))[0]
+    return (f'{THUMBNAIL_DIR}{stem}_{size_name}.'
+            f'{THUMBNAIL_FORMAT.lower()}')
+
+
+def delete_thumbnails(variants, keep=()):
+    """Удаляет файлы уменьшенных копий, кроме перечисленных в keep."""
+    for size_name in THUMBNAIL_SIZES:
+        name = variants.get(size_name)
+        if name and name not in keep:
+            default_storage.delete(name)
+
+
+def make_thumbnails(recipe_id, image_name):
+    """Перекодирует картинку рецепта и сохраняет уменьшенные копии.
+
+    Копии прежней картинки удаляются. Если картинку успели заменить
+    или рецепт удалён, удаляются только что сделанные копии.
+    """
+    old_variants = Recipe.objects.filter(pk=recipe_id).values_list(
+        'image_variants', flat=True).first() or {}
+    with default_storage.open(image_name) as image_file:
+        image = ImageOps.exif_transpose(Image.open(image_file))
+        image = image.convert('RGB')
+    variants = {'source': image_name}
+    for size_name, size in THUMBNAIL_SIZES.items():
+        thumbnail = image.copy()
+        thumbnail.thumbnail((size, size))
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, THUMBNAIL_FORMAT, quality=80)
+        name = thumbnail_name(image_name, size_name)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        variants[size_name] = default_storage.save(
+            name, ContentFile(buffer.getvalue()))
+    if Recipe.objects.filter(pk=recipe_id, image=image_name).update(
+            image_variants=variants):
+        delete_thumbnails(old_variants, keep=set(variants.values()))
+    else:
+        delete_thumbnails(variants)
+
+
+def process_image(recipe_id, image_name):
+    """Задача пула: ошибки только логируются, соединения закрываются."""
+    try:
+        make_thumbnails(recipe_id, image_name)
+    except Exception:
+        logger.exception('Не удалось обработать картинку %s', image_name)
+    finally:
+        connections.close_all()
+
+
+def schedule_thumbnails(recipe):
+    """Обработка картинки в пуле после коммита транзакции."""
+    recipe_id, image_name = recipe.pk, recipe.image.name
+    transaction.on_commit(
+        lambda: get_executor().submit(process_image, recipe_id, image_name))
@@ -0,0 +1,21 @@
+from django.db import connections
+
+from .models import RecipeTag
+
+TAG_TABLE = RecipeTag._meta.db_table
+
+STATEMENTS = (
+    f'CREATE INDEX IF NOT EXISTS {TAG_TABLE}_tag_recipe '
+    f'ON {TAG_TABLE} (tag_id, recipe_id)',
+)
+
+
+def install_indexes(using='default', **kwargs):
+    """Индексы таблиц, которые Django создаёт сам, после миграций.
+
+    У автоматической таблицы тегов рецепта есть уникальный индекс
+    (recipe_id, tag_id), для фильтра по тегу нужен обратный.
+    """
+    with connections[using].cursor() as cursor:
+        for statement in STATEMENTS:
+            cursor.execute(statement)
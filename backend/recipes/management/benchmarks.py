@@ -0,0 +1,3 @@
+def percentile(values, share):
+    """Процентиль отсортированного списка."""
+    return values[min(len(values) - 1, int(len(values) * share))]
@@ -0,0 +1,56 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+from users.models import User
+
+CHANGELISTS = (
+    'recipes/recipe',
+    'recipes/favorite',
+    'recipes/shoppingcart',
+    'recipes/ingredient',
+    'users/user',
+    'users/follow',
+)
+
+
+class Command(BaseCommand):
+    """Замер времени отрисовки списков админки."""
+
+    help = ('Открывает списки админки от имени суперпользователя и '
+            'выводит время ответа и число запросов. Запускать на '
+            'заполненной базе (например, 1M рецептов).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--query', default='',
+                            help='Строка запроса, например q=борщ.')
+        parser.add_argument('changelists', nargs='*', default=CHANGELISTS)
+
+    def handle(self, *args, **options):
+        admin = User.objects.filter(is_superuser=True).first()
+        if admin is None:
+            raise CommandError('Нужен хотя бы один суперпользователь')
+        client = Client(SERVER_NAME=options['host'])
+        client.force_login(admin)
+        for changelist in options['changelists']:
+            url = f'/admin/{changelist}/?{options["query"]}'
+            timings = []
+            for _ in range(options['repeat']):
+                with CaptureQueriesContext(connection) as queries:
+                    started = time.perf_counter()
+                    response = client.get(url)
+                    timings.append(time.perf_counter() - started)
+                if response.status_code != 200:
+                    raise CommandError(
+                        f'{url}: ответ {response.status_code}')
+            self.stdout.write(
+                f'{changelist}: медиана '
+                f'{statistics.median(timings) * 1000:.1f} мс, '
+                f'максимум {max(timings) * 1000:.1f} мс, '
+                f'запросов {len(queries)}')
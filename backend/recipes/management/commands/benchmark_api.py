@@ -0,0 +1,206 @@
+import json
+import re
+import time
+import tracemalloc
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import Client
+from rest_framework.authtoken.models import Token
+
+from recipes.management.benchmarks import percentile
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+COLLECTION = (settings.BASE_DIR.parent / 'postman-collection'
+              / 'diploma.postman_collection.json')
+VARIABLE = re.compile(r'{{(\w+)}}')
+QUERIES = re.compile(r'desc="(\d+) queries"')
+ORDINALS = ('first', 'second', 'third', 'fourth', 'fifth')
+COMPARED = ('p50', 'p95')
+
+
+def collection_requests(items, methods):
+    """Запросы коллекции: имя, адрес и заголовок авторизации."""
+    for item in items:
+        if 'item' in item:
+            yield from collection_requests(item['item'], methods)
+            continue
+        request = item['request']
+        if request['method'] not in methods:
+            continue
+        auth = request.get('auth') or {}
+        values = {value['key']: value['value']
+                  for value in auth.get('apikey', ())}
+        url = request['url']
+        yield (f'{request["method"]} {item["name"]}',
+               url['raw'] if isinstance(url, dict) else url,
+               values.get('value'))
+
+
+def seeded_variables():
+    """Значения переменных коллекции из заполненной базы."""
+    variables = {}
+    users = User.objects.annotate(
+        follows=Count('follower')).order_by('-follows', 'id')[:3]
+    for prefix, user in zip(('user', 'secondUser', 'thirdUser'), users):
+        variables[f'{prefix}Id'] = user.pk
+        variables[f'{prefix}Token'] = Token.objects.get_or_create(
+            user=user)[0].key
+    for ordinal, tag in zip(ORDINALS, Tag.objects.order_by('id')[:3]):
+        variables[f'{ordinal}TagId'] = tag.pk
+        variables[f'{ordinal}TagSlug'] = tag.slug
+    recipe_ids = Recipe.objects.order_by('id').values_list('pk', flat=True)
+    for ordinal, recipe_id in zip(ORDINALS, recipe_ids[:5]):
+        variables[f'{ordinal}RecipeId'] = recipe_id
+    ingredient = Ingredient.objects.order_by('id').first()
+    if ingredient is not None:
+        variables['firstIndredientId'] = ingredient.pk
+        variables['ingredientNameFirstLatter'] = ingredient.name[0]
+    return variables
+
+
+def regressions(results, baseline, threshold, min_delta):
+    """Эндпоинты, которые стали хуже базовой линии."""
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        for metric in COMPARED + ('peak_kib',):
+            if (result[metric] > base[metric] * (1 + threshold)
+                    and result[metric] - base[metric] > min_delta):
+                yield (f'{name}: {metric} {base[metric]} -> '
+                       f'{result[metric]}')
+        if (None not in (result['queries'], base['queries'])
+                and result['queries'] > base['queries']):
+            yield (f'{name}: запросов {base["queries"]} -> '
+                   f'{result["queries"]}')
+
+
+class Command(BaseCommand):
+    """Замер эндпоинтов по запросам postman-коллекции."""
+
+    help = ('Повторяет GET-запросы postman-коллекции на заполненной базе '
+            'через тестовый клиент или на запущенном сервере (--url). '
+            'Для каждого выводит p50/p95/p99, число SQL-запросов и пик '
+            'памяти. Сохраняет базовую линию и падает, если p50, p95, '
+            'память или число запросов стали хуже порога.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--collection', default=str(COLLECTION))
+        parser.add_argument('--url', help='Адрес запущенного сервера.')
+        parser.add_argument('--host', default='localhost')
+        parser.add_argument('--repeat', type=int, default=30)
+        parser.add_argument('--baseline', help='Файл базовой линии.')
+        parser.add_argument('--save-baseline',
+                            help='Сохранить результаты как базовую линию.')
+        parser.add_argument('--threshold', type=float, default=0.2,
+                            help='Допустимое ухудшение, доля.')
+        parser.add_argument('--min-delta', type=float, default=1.0,
+                            help='Меньшие абсолютные изменения не '
+                                 'считаются (мс или КиБ).')
+
+    def handle(self, *args, **options):
+        with open(options['collection'], encoding='utf8') as collection:
+            items = json.load(collection)['item']
+        variables = seeded_variables()
+        if options['url']:
+            send = self.sender_http(options['url'].rstrip('/'))
+        else:
+            send = self.sender_in_process(Client(SERVER_NAME=options['host']))
+        results = {}
+        for name, raw_url, auth in collection_requests(items, {'GET'}):
+            try:
+                url = VARIABLE.sub(
+                    lambda match: str(variables[match.group(1)]),
+                    raw_url.replace('{{baseUrl}}', ''))
+                auth = auth and VARIABLE.sub(
+                    lambda match: str(variables[match.group(1)]), auth)
+            except KeyError as error:
+                self.stdout.write(f'{name}: нет данных для {error}')
+                continue
+            url = quote(url, safe='/?=&')
+            results[name] = self.measure(
+                send, url, auth, options['repeat'], not options['url'])
+            self.report(name, results[name])
+        if options['save_baseline']:
+            with open(options['save_baseline'], 'w') as baseline:
+                json.dump(results, baseline, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            self.compare(results, options)
+
+    @staticmethod
+    def sender_in_process(client):
+        """Запрос через тестовый клиент Django."""
+        def send(url, auth):
+            headers = {'HTTP_AUTHORIZATION': auth} if auth else {}
+            response = client.get(url, **headers)
+            response.getvalue()
+            return response.status_code, response.get('Server-Timing', '')
+        return send
+
+    @staticmethod
+    def sender_http(base):
+        """Запрос к запущенному серверу."""
+        def send(url, auth):
+            headers = {'Authorization': auth} if auth else {}
+            try:
+                with urlopen(Request(base + url, headers=headers),
+                             timeout=30) as response:
+                    response.read()
+                    status = response.status
+            except HTTPError as error:
+                error.read()
+                response, status = error, error.code
+            return status, response.headers.get('Server-Timing', '')
+        return send
+
+    @staticmethod
+    def measure(send, url, auth, repeat, trace_memory):
+        """Прогрев, repeat замеров и отдельный замер памяти."""
+        send(url, auth)
+        timings = []
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            status, server_timing = send(url, auth)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        peak = 0
+        if trace_memory:
+            tracemalloc.start()
+            send(url, auth)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        queries = QUERIES.search(server_timing)
+        return {
+            'status': status,
+            'p50': round(percentile(timings, 0.5), 2),
+            'p95': round(percentile(timings, 0.95), 2),
+            'p99': round(percentile(timings, 0.99), 2),
+            'queries': int(queries.group(1)) if queries else None,
+            'peak_kib': round(peak / 1024, 1),
+        }
+
+    def report(self, name, result):
+        """Строка результата эндпоинта."""
+        self.stdout.write(
+            f'{name[:60]:<60} {result["status"]} '
+            f'p50 {result["p50"]:.1f} p95 {result["p95"]:.1f} '
+            f'p99 {result["p99"]:.1f} мс, запросов {result["queries"]}, '
+            f'пик {result["peak_kib"]:.0f} КиБ')
+
+    def compare(self, results, options):
+        """Сравнение с базовой линией, ошибка при ухудшении."""
+        with open(options['baseline'], encoding='utf8') as baseline:
+            baseline = json.load(baseline)
+        worse = list(regressions(results, baseline, options['threshold'],
+                                 options['min_delta']))
+        for line in worse:
+            self.stderr.write(line)
+        if worse:
+            raise CommandError(f'Ухудшились эндпоинты: {len(worse)}')
+        self.stdout.write(self.style.SUCCESS('Хуже базовой линии не стало'))
@@ -0,0 +1,67 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+
+from constants import FEED_FANOUT_LIMIT
+from recipes import feed
+from recipes.models import Recipe
+from users.models import User
+
+
+def measure(function, repeat):
+    """Медиана времени вызова в миллисекундах."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+class Command(BaseCommand):
+    """Сравнение ленты из таймлайна и ленты из подписок."""
+
+    help = ('Сравнивает чтение первой страницы ленты из таймлайна '
+            '(fan-out при записи) и из JOIN подписок с рецептами '
+            '(fan-out при чтении), а также время рассылки рецепта.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int,
+                            help='id читателя, по умолчанию с '
+                                 'наибольшим числом подписок.')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--limit', type=int, default=6)
+
+    def handle(self, *args, **options):
+        users = User.objects.annotate(follows=Count('follower'))
+        if options['user']:
+            user = users.filter(pk=options['user']).first()
+        else:
+            user = users.order_by('-follows').first()
+        if user is None:
+            raise CommandError('Нет пользователя для замера')
+        limit, repeat = options['limit'], options['repeat']
+
+        def page(recipes):
+            return lambda: list(recipes.order_by('-id').values_list(
+                'pk', flat=True)[:limit])
+
+        timeline = measure(page(feed.feed_recipes(user)), repeat)
+        on_read = measure(page(feed.followed_recipes(user)), repeat)
+        self.stdout.write(
+            f'Пользователь {user.pk}, подписок {user.follows}: '
+            f'таймлайн {timeline:.2f} мс, JOIN подписок {on_read:.2f} мс')
+
+        recipe = Recipe.objects.filter(
+            author__followers_count__gt=0,
+            author__followers_count__lte=FEED_FANOUT_LIMIT,
+        ).order_by('-author__followers_count', '-id').select_related(
+            'author').first()
+        if recipe is not None:
+            fan_out = measure(lambda: feed.fan_out(recipe), repeat)
+            self.stdout.write(
+                f'Рассылка рецепта {recipe.pk} '
+                f'{recipe.author.followers_count} подписчикам: '
+                f'{fan_out:.2f} мс')
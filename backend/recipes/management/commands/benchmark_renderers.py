@@ -0,0 +1,90 @@
+import datetime
+import io
+import time
+from decimal import Decimal
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.utils.translation import gettext_lazy
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.recipe_rows import recipe_rows, represent_recipes
+from api.renderers import FastJSONParser, FastJSONRenderer, orjson
+from api.serializers import IngredientSerializer
+from recipes.models import Ingredient, Recipe
+
+SPECIAL_VALUES = {
+    'decimal': Decimal('12.50'),
+    'utc': datetime.datetime(2024, 1, 2, 3, 4, 5, 678901,
+                             tzinfo=datetime.timezone.utc),
+    'naive': datetime.datetime(2024, 1, 2, 3, 4, 5),
+    'date': datetime.date(2024, 1, 2),
+    'time': datetime.time(3, 4, 5),
+    'lazy': gettext_lazy('Отлично'),
+    'separators': 'строка\u2028абзац\u2029',
+    1: 'ключ не строка',
+}
+
+
+def best_time(function, repeat):
+    """Лучшее из repeat время вызова в секундах."""
+    best = float('inf')
+    for _ in range(max(repeat, 1)):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+class Command(BaseCommand):
+    """Сравнение и замер JSON-рендерера и парсера."""
+
+    help = ('Проверяет, что FastJSONRenderer отдаёт те же байты, что '
+            'JSONRenderer из DRF, на полном списке ингредиентов, на '
+            'странице рецептов и на Decimal, датах и ленивых строках. '
+            'Затем замеряет рендер и разбор этих ответов.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--recipes', type=int, default=100,
+                            help='Рецептов на странице.')
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write('orjson не установлен, сравнивается DRF с DRF')
+        request = RequestFactory().get('/api/recipes/')
+        request.user = AnonymousUser()
+        payloads = {
+            'ingredients': IngredientSerializer(
+                Ingredient.objects.all(), many=True).data,
+            'recipes': represent_recipes(recipe_rows(
+                Recipe.objects.with_user_data(request.user)[
+                    :options['recipes']]), request),
+            'special': SPECIAL_VALUES,
+        }
+        slow, fast = JSONRenderer(), FastJSONRenderer()
+        for name, data in payloads.items():
+            expected = slow.render(data)
+            if fast.render(data) != expected:
+                raise CommandError(f'{name}: вывод отличается от DRF')
+            self.report(name, expected, options['repeat'], {
+                'JSONRenderer': lambda: slow.render(data),
+                'FastJSONRenderer': lambda: fast.render(data),
+                'JSONParser': lambda: JSONParser().parse(
+                    io.BytesIO(expected)),
+                'FastJSONParser': lambda: FastJSONParser().parse(
+                    io.BytesIO(expected)),
+            })
+        self.stdout.write(self.style.SUCCESS('Вывод совпадает с DRF'))
+
+    def report(self, name, content, repeat, functions):
+        """Время и скорость каждого способа на одном ответе."""
+        size = len(content)
+        self.stdout.write(f'{name}: {size / 1024:.1f} КиБ')
+        for label, function in functions.items():
+            elapsed = best_time(function, repeat)
+            self.stdout.write(
+                f'  {label:<17} {elapsed * 1000:8.2f} мс '
+                f'{size / max(elapsed, 1e-9) / 2 ** 20:8.1f} МиБ/с')
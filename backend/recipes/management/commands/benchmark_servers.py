@@ -0,0 +1,119 @@
+import os
+import statistics
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+from urllib.parse import quote
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.management.benchmarks import percentile
+
+SERVERS = {
+    'wsgi': ('foodgram.wsgi:application',),
+    'asgi': ('foodgram.asgi:application',
+             '--worker-class', 'uvicorn.workers.UvicornWorker'),
+}
+PATHS = ('/api/tags/', '/api/ingredients/?name=мо', '/api/recipes/',
+         '/api/recipes/?limit=20')
+
+
+class Command(BaseCommand):
+    """Сравнение WSGI и ASGI при одинаковом числе воркеров."""
+
+    help = ('По очереди запускает gunicorn с синхронными воркерами и с '
+            'воркерами uvicorn, нагружает одни и те же адреса и выводит '
+            'запросы в секунду, p50 и p99.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--duration', type=float, default=10)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--token', help='Токен для авторизации.')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='Адрес для нагрузки, можно несколько.')
+        parser.add_argument('servers', nargs='*', default=list(SERVERS))
+
+    def handle(self, *args, **options):
+        base = f'http://127.0.0.1:{options["port"]}'
+        headers = {'Host': 'localhost'}
+        if options['token']:
+            headers['Authorization'] = f'Token {options["token"]}'
+        urls = [base + quote(path, safe='/?=&')
+                for path in options['paths'] or PATHS]
+        for server in options['servers']:
+            process = self.start(server, options)
+            try:
+                self.wait(urls[0], headers)
+                self.report(server, self.load(urls, headers, options))
+            finally:
+                process.terminate()
+                process.wait()
+
+    def start(self, server, options):
+        """Запуск gunicorn с нужным приложением."""
+        if server not in SERVERS:
+            raise CommandError(f'Неизвестный сервер {server}')
+        command = [
+            'gunicorn', *SERVERS[server],
+            '--workers', str(options['workers']),
+            '--bind', f'127.0.0.1:{options["port"]}',
+            '--log-level', 'warning',
+        ]
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ.get(
+            'DJANGO_SETTINGS_MODULE', 'foodgram.settings'))
+        return subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+
+    @staticmethod
+    def wait(url, headers, timeout=30):
+        """Ждём, пока сервер начнёт отвечать."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            try:
+                urlopen(Request(url, headers=headers), timeout=1).read()
+                return
+            except (URLError, ConnectionError):
+                time.sleep(0.2)
+        raise CommandError(f'Сервер не ответил за {timeout} с')
+
+    @staticmethod
+    def load(urls, headers, options):
+        """Нагрузка: concurrency клиентов по кругу обходят urls."""
+        deadline = time.monotonic() + options['duration']
+
+        def client(number):
+            timings, errors = [], 0
+            position = number
+            while time.monotonic() < deadline:
+                url = urls[position % len(urls)]
+                position += 1
+                started = time.perf_counter()
+                try:
+                    urlopen(Request(url, headers=headers), timeout=30).read()
+                except (URLError, ConnectionError):
+                    errors += 1
+                    continue
+                timings.append(time.perf_counter() - started)
+            return timings, errors
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(options['concurrency']) as pool:
+            results = list(pool.map(client, range(options['concurrency'])))
+        elapsed = time.monotonic() - started
+        timings = sorted(t for result in results for t in result[0])
+        return timings, sum(result[1] for result in results), elapsed
+
+    def report(self, server, result):
+        """Вывод результатов одного сервера."""
+        timings, errors, elapsed = result
+        if not timings:
+            raise CommandError(f'{server}: ни одного успешного ответа')
+        self.stdout.write(
+            f'{server}: {len(timings) / elapsed:.0f} запросов/с, '
+            f'p50 {statistics.median(timings) * 1000:.1f} мс, '
+            f'p99 {percentile(timings, 0.99) * 1000:.1f} мс, '
+            f'ошибок {errors}')
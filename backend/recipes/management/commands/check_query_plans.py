@@ -0,0 +1,119 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Count
+from django.test import RequestFactory
+
+from api.filters import FilterRecipes
+from recipes.models import Recipe, Tag
+from users.models import User
+
+RECIPE_TABLE = Recipe._meta.db_table
+PAGE_SIZE = 6
+DISTINCT_STEPS = ('Unique', 'HashAggregate', 'TEMP B-TREE FOR DISTINCT')
+
+
+def postgresql_steps(connection, sql, params):
+    """Узлы плана PostgreSQL: таблица и способ доступа."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get('Plans', ()))
+        yield node.get('Relation Name'), node['Node Type']
+
+
+def sqlite_steps(connection, sql, params):
+    """Строки EXPLAIN QUERY PLAN SQLite: таблица или псевдоним и шаг."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        rows = cursor.fetchall()
+    for *_, detail in rows:
+        words = detail.split()
+        table = words[1] if words[0] in ('SCAN', 'SEARCH') else None
+        yield table, detail
+
+
+PLANS = {'postgresql': postgresql_steps, 'sqlite': sqlite_steps}
+
+
+def full_scan(table, step):
+    """Полный проход по таблице, кроме самих рецептов."""
+    if table is None or table == RECIPE_TABLE:
+        return False
+    return step == 'Seq Scan' or step.startswith('SCAN ')
+
+
+class Command(BaseCommand):
+    """Проверка планов запросов фильтров рецептов."""
+
+    help = ('Строит EXPLAIN для первой страницы рецептов с фильтрами по '
+            'тегам, автору, избранному и корзине. Падает, если связанная '
+            'таблица читается целиком или план убирает дубли. Запускать '
+            'на большой базе, например после generate_dataset: на '
+            'маленьких таблицах планировщик законно выбирает полный '
+            'проход.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int,
+                            help='id пользователя для избранного и корзины.')
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor not in PLANS:
+            raise CommandError(f'Планы {connection.vendor} не разбираются')
+        user = self.pick_user(options['user'])
+        author = User.objects.order_by('-recipes_count').first()
+        slugs = list(Tag.objects.order_by('id').values_list(
+            'slug', flat=True)[:2])
+        if author is None or not slugs:
+            raise CommandError('База пуста, сначала generate_dataset')
+        scenarios = {
+            'tags': {'tags': slugs},
+            'author': {'author': author.pk},
+            'is_favorited': {'is_favorited': '1'},
+            'is_in_shopping_cart': {'is_in_shopping_cart': '1'},
+            'all': {'tags': slugs, 'is_favorited': '1',
+                    'is_in_shopping_cart': '1'},
+        }
+        request = RequestFactory().get('/')
+        request.user = user
+        failures = 0
+        for name, data in scenarios.items():
+            queryset = FilterRecipes(
+                data, queryset=Recipe.objects.with_user_data(user),
+                request=request).qs[:PAGE_SIZE]
+            sql, params = queryset.query.sql_with_params()
+            steps = list(PLANS[connection.vendor](connection, sql, params))
+            failures += self.report(name, steps)
+        if failures:
+            raise CommandError(f'Плохих планов: {failures}')
+        self.stdout.write(self.style.SUCCESS('Все фильтры идут по индексам'))
+
+    @staticmethod
+    def pick_user(user_id):
+        """Заданный пользователь или тот, у кого больше всего избранного."""
+        if user_id is not None:
+            return User.objects.get(pk=user_id)
+        return User.objects.annotate(
+            favorites_total=Count('favorites')
+        ).order_by('-favorites_total').first()
+
+    def report(self, name, steps):
+        """Вывод плана сценария, 1 если план плохой."""
+        bad = [f'{table}: {step}' for table, step in steps
+               if full_scan(table, step)]
+        bad += [step for _, step in steps
+                if any(marker in step for marker in DISTINCT_STEPS)]
+        self.stdout.write(f'{name}:')
+        for table, step in steps:
+            self.stdout.write(f'  {table or "-"}: {step}')
+        if bad:
+            self.stderr.write(f'{name}: {"; ".join(bad)}')
+        return int(bool(bad))
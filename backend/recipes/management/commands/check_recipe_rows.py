@@ -0,0 +1,107 @@
+import json
+import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import RequestFactory
+
+from api.recipe_rows import recipe_rows, represent_recipes
+from api.serializers import RecipeSerializer
+from recipes.models import Recipe
+from users.models import User
+
+
+def first_difference(expected, actual, path='$'):
+    """Путь до первого расхождения двух JSON-значений или None."""
+    if isinstance(expected, dict) and isinstance(actual, dict):
+        if list(expected) != list(actual):
+            return f'{path}: ключи {list(expected)} != {list(actual)}'
+        for key in expected:
+            difference = first_difference(expected[key], actual[key],
+                                          f'{path}.{key}')
+            if difference:
+                return difference
+        return None
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(expected) != len(actual):
+            return f'{path}: длина {len(expected)} != {len(actual)}'
+        for index, (left, right) in enumerate(zip(expected, actual)):
+            difference = first_difference(left, right, f'{path}[{index}]')
+            if difference:
+                return difference
+        return None
+    if expected != actual or type(expected) is not type(actual):
+        return f'{path}: {expected!r} != {actual!r}'
+    return None
+
+
+class Command(BaseCommand):
+    """Сверка и замер быстрого чтения рецептов."""
+
+    help = ('Сравнивает ответ represent_recipes с RecipeSerializer на '
+            'одних и тех же рецептах, для гостя и пользователя, и падает '
+            'при расхождении. Затем замеряет время на рецепт обоих путей '
+            'вместе с запросами к базе.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100,
+                            help='Рецептов на страницу.')
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--user', type=int,
+                            help='id пользователя, по умолчанию с самым '
+                                 'большим избранным.')
+
+    def handle(self, *args, **options):
+        user = self.pick_user(options['user'])
+        for viewer in (AnonymousUser(), user):
+            request = RequestFactory().get('/api/recipes/')
+            request.user = viewer
+            queryset = Recipe.objects.with_user_data(viewer)[
+                :options['limit']]
+            serializer, rows = self.renderers(queryset, request)
+            expected = json.loads(json.dumps(serializer()))
+            difference = first_difference(expected, rows())
+            name = 'гость' if viewer.is_anonymous else f'user {viewer.pk}'
+            if difference:
+                raise CommandError(f'{name}: {difference}')
+            self.stdout.write(f'{name}: {len(expected)} рецептов совпадают')
+            self.measure('RecipeSerializer', serializer, len(expected),
+                         options['repeat'])
+            self.measure('represent_recipes', rows, len(expected),
+                         options['repeat'])
+        self.stdout.write(self.style.SUCCESS('Ответы совпадают'))
+
+    @staticmethod
+    def renderers(queryset, request):
+        """Оба пути чтения страницы вместе с запросами к базе."""
+        def serializer():
+            return RecipeSerializer(queryset.all(), many=True,
+                                    context={'request': request}).data
+
+        def rows():
+            return represent_recipes(recipe_rows(queryset.all()), request)
+        return serializer, rows
+
+    @staticmethod
+    def pick_user(user_id):
+        """Заданный пользователь или тот, у кого больше всего избранного."""
+        if user_id is not None:
+            return User.objects.get(pk=user_id)
+        user = User.objects.annotate(
+            favorites_total=Count('favorites')
+        ).order_by('-favorites_total').first()
+        if user is None:
+            raise CommandError('База пуста, сначала generate_dataset')
+        return user
+
+    def measure(self, path, render, size, repeat):
+        """Лучшее из repeat время страницы и время на рецепт."""
+        best = float('inf')
+        for _ in range(max(repeat, 1)):
+            started = time.perf_counter()
+            render()
+            best = min(best, time.perf_counter() - started)
+        self.stdout.write(
+            f'  {path:<18} {best * 1000:8.2f} мс на страницу, '
+            f'{best * 1e6 / max(size, 1):8.1f} мкс на рецепт')
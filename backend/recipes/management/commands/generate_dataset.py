@@ -0,0 +1,235 @@
+import os
+import random
+import time
+from functools import lru_cache
+from itertools import accumulate
+from multiprocessing import get_context
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+
+from recipes import feed
+from recipes.models import (Favorite, Ingredient, IngredientsInRecipe,
+                            Recipe, RecipeTag, ShoppingCart, Tag)
+from users.models import Follow, User
+
+WORDS = ('курица', 'томаты', 'соус', 'запечь', 'обжарить', 'смешать',
+         'нарезать', 'тесто', 'сыр', 'зелень', 'быстро', 'духовка',
+         'сковорода', 'суп', 'салат', 'пирог', 'каша', 'гриль')
+IMAGE = 'recipes/generated.png'
+PARAMS = {}
+
+
+@lru_cache(maxsize=None)
+def zipf_weights(size, skew):
+    """Накопленные веса закона Ципфа для рангов от 1 до size."""
+    return list(accumulate(1 / rank ** skew for rank in range(1, size + 1)))
+
+
+def skewed(rng, size, count):
+    """Ранги меньше size в количестве count, малые выпадают чаще."""
+    return rng.choices(range(size), k=count,
+                       cum_weights=zipf_weights(size, PARAMS['skew']))
+
+
+def words(rng, count):
+    """Случайный текст из count слов."""
+    return ' '.join(rng.choices(WORDS, k=count))
+
+
+def save(model, objects, ignore_conflicts=False):
+    """Вставка пачками в одной транзакции."""
+    with transaction.atomic():
+        model.objects.bulk_create(objects, batch_size=PARAMS['batch_size'],
+                                  ignore_conflicts=ignore_conflicts)
+    return len(objects)
+
+
+def create_users(rng, start, size):
+    """Пользователи с id из заданного диапазона."""
+    first_id = PARAMS['first_user'] + start
+    return save(User, [
+        User(id=pk, username=f'user{pk}', email=f'user{pk}@example.com',
+             first_name=words(rng, 1).title(),
+             last_name=words(rng, 1).title(),
+             password=PARAMS['password'])
+        for pk in range(first_id, first_id + size)])
+
+
+def recipe_ingredients(rng, recipe_id):
+    """Ингредиенты рецепта, популярные встречаются чаще."""
+    ingredient_ids = PARAMS['ingredient_ids']
+    wanted = max(1, round(rng.expovariate(1 / PARAMS['per_recipe'])))
+    ranks = dict.fromkeys(skewed(rng, len(ingredient_ids), wanted * 2))
+    return [IngredientsInRecipe(recipe_id=recipe_id,
+                                ingredient_id=ingredient_ids[rank],
+                                amount=rng.randint(1, 500))
+            for rank in list(ranks)[:wanted]]
+
+
+def create_recipes(rng, start, size):
+    """Рецепты с id из диапазона, их теги и ингредиенты."""
+    first_id = PARAMS['first_recipe'] + start
+    recipe_ids = range(first_id, first_id + size)
+    authors = skewed(rng, PARAMS['users'], size)
+    tag_ids = PARAMS['tag_ids']
+    save(Recipe, [
+        Recipe(id=pk, author_id=PARAMS['first_user'] + author, image=IMAGE,
+               name=f'{words(rng, 2).capitalize()} {pk}',
+               text=words(rng, rng.randint(10, 60)),
+               cooking_time=rng.randint(1, 180))
+        for pk, author in zip(recipe_ids, authors)])
+    most_tags = min(3, len(tag_ids))
+    save(RecipeTag, [
+        RecipeTag(recipe_id=pk, tag_id=tag_id) for pk in recipe_ids
+        for tag_id in rng.sample(tag_ids, rng.randint(1, most_tags))])
+    save(IngredientsInRecipe, [
+        row for pk in recipe_ids for row in recipe_ingredients(rng, pk)])
+    return size
+
+
+def create_links(model, field, rng, size):
+    """Связи пользователей с популярными рецептами или авторами."""
+    users, first_user = PARAMS['users'], PARAMS['first_user']
+    if field == 'author_id':
+        targets, first_target = users, first_user
+    else:
+        targets, first_target = PARAMS['recipes'], PARAMS['first_recipe']
+    objects = []
+    for rank in skewed(rng, targets, size):
+        user_id = first_user + rng.randrange(users)
+        target_id = first_target + rank
+        if field == 'author_id' and user_id == target_id:
+            continue
+        objects.append(model(user_id=user_id, **{field: target_id}))
+    return save(model, objects, ignore_conflicts=True)
+
+
+PHASES = {
+    'users': create_users,
+    'recipes': create_recipes,
+    'favorites': lambda rng, start, size: create_links(
+        Favorite, 'recipe_id', rng, size),
+    'shopping_cart': lambda rng, start, size: create_links(
+        ShoppingCart, 'recipe_id', rng, size),
+    'follows': lambda rng, start, size: create_links(
+        Follow, 'author_id', rng, size),
+}
+
+PHASE_MODELS = {'users': User, 'recipes': Recipe, 'favorites': Favorite,
+                'shopping_cart': ShoppingCart, 'follows': Follow}
+
+
+def run_task(task):
+    """Одна пачка фазы, свой генератор на пачку для повторяемости."""
+    phase, start, size = task
+    rng = random.Random(f'{PARAMS["seed"]}-{phase}-{start}')
+    return PHASES[phase](rng, start, size)
+
+
+class Command(BaseCommand):
+    """Генерация большой синтетической базы."""
+
+    help = ('Заполняет базу пользователями, рецептами, избранным, '
+            'корзинами и подписками со степенным распределением '
+            'популярности. Пишет пачками в несколько процессов, затем '
+            'пересчитывает счётчики, списки покупок и ленты. Ингредиенты '
+            'и теги должны быть уже загружены.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--recipes', type=int, default=100000)
+        parser.add_argument('--ingredients-per-recipe', type=float,
+                            default=8, help='Среднее число ингредиентов.')
+        parser.add_argument('--favorites', type=int, default=500000)
+        parser.add_argument('--shopping-cart', type=int, default=50000)
+        parser.add_argument('--follows', type=int, default=100000)
+        parser.add_argument('--skew', type=float, default=1.1,
+                            help='Показатель закона Ципфа.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--processes', type=int,
+                            default=os.cpu_count())
+        parser.add_argument('--seed', default='0')
+        parser.add_argument('--password', default='generated-password')
+
+    def handle(self, *args, **options):
+        ingredient_ids = list(
+            Ingredient.objects.order_by('id').values_list('pk', flat=True))
+        tag_ids = list(Tag.objects.values_list('pk', flat=True))
+        if not ingredient_ids or not tag_ids:
+            raise CommandError('Сначала загрузите ингредиенты и теги')
+        if options['users'] < 2 or options['recipes'] < 1:
+            raise CommandError('Нужно хотя бы 2 пользователя и 1 рецепт')
+        processes = max(options['processes'], 1)
+        if connection.vendor == 'sqlite' and processes > 1:
+            self.stdout.write('SQLite не пишет параллельно, один процесс')
+            processes = 1
+        PARAMS.update(
+            seed=options['seed'], skew=options['skew'],
+            batch_size=options['batch_size'],
+            password=make_password(options['password']),
+            per_recipe=options['ingredients_per_recipe'],
+            users=options['users'], recipes=options['recipes'],
+            first_user=self.next_id(User), first_recipe=self.next_id(Recipe),
+            ingredient_ids=ingredient_ids, tag_ids=tag_ids)
+        phases = (('users', options['users']),
+                  ('recipes', options['recipes']),
+                  ('favorites', options['favorites']),
+                  ('shopping_cart', options['shopping_cart']),
+                  ('follows', options['follows']))
+        if processes == 1:
+            for phase, total in phases:
+                self.run_phase(map, phase, total)
+        else:
+            connections.close_all()
+            with get_context('fork').Pool(processes) as pool:
+                for phase, total in phases:
+                    self.run_phase(pool.imap_unordered, phase, total)
+        self.finish()
+
+    @staticmethod
+    def next_id(model):
+        """Первый свободный id модели."""
+        return (model.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+
+    def run_phase(self, mapper, phase, total):
+        """Фаза генерации, разбитая на пачки по batch_size строк.
+
+        Строки считаются по таблице: повторы связей, пропущенные
+        ignore_conflicts, в скорость не попадают.
+        """
+        size = PARAMS['batch_size']
+        tasks = [(phase, start, min(size, total - start))
+                 for start in range(0, total, size)]
+        model = PHASE_MODELS[phase]
+        before = model.objects.count()
+        started = time.perf_counter()
+        requested = sum(mapper(run_task, tasks))
+        elapsed = time.perf_counter() - started
+        rows = model.objects.count() - before
+        self.stdout.write(f'{phase}: {rows} из {requested} строк за '
+                          f'{elapsed:.1f} с '
+                          f'({rows / max(elapsed, 1e-9):.0f} строк/с)')
+
+    def finish(self):
+        """Сдвиг последовательностей и пересчёт денормализованных данных.
+
+        bulk_create не отправляет сигналы, поэтому счётчики, списки
+        покупок и ленты собираются заново. Поисковый индекс обновляется
+        самой базой.
+        """
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [User, Recipe])
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+        call_command('reconcile_counters', stdout=self.stdout)
+        call_command('rebuild_shopping_lists', stdout=self.stdout)
+        timelines = feed.rebuild(
+            User.objects.filter(pk__gte=PARAMS['first_user']))
+        self.stdout.write(f'Лент пересобрано: {timelines}')
+        self.stdout.write(self.style.SUCCESS('Данные сгенерированы'))
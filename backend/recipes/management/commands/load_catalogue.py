@@ -0,0 +1,131 @@
+import csv
+import io
+import json
+import os
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.cache import bump_catalogue_version
+from recipes.models import Ingredient, Tag
+
+MODELS = {
+    'ingredients': (Ingredient, ('name', 'measurement_unit')),
+    'tags': (Tag, ('name', 'color', 'slug')),
+}
+
+
+def read_csv(path, fields):
+    """Строки CSV, заголовок необязателен."""
+    with open(path, encoding='utf8', newline='') as csv_file:
+        reader = csv.reader(csv_file)
+        for number, row in enumerate(reader):
+            if number == 0 and tuple(row) == fields:
+                continue
+            yield row
+
+
+def read_json(path, fields):
+    """Строки JSON-массива или JSON Lines (.jsonl)."""
+    with open(path, encoding='utf8') as json_file:
+        if path.endswith('.jsonl'):
+            items = (json.loads(line) for line in json_file if line.strip())
+        else:
+            items = json.load(json_file)
+        for item in items:
+            yield [item.get(field) for field in fields]
+
+
+def clean(rows, fields):
+    """Строки без пустых значений и лишних пробелов."""
+    for row in rows:
+        row = [(value or '').strip() for value in row]
+        if len(row) == len(fields) and all(row):
+            yield row
+
+
+READERS = {'.csv': read_csv, '.json': read_json, '.jsonl': read_json}
+
+
+def batches(rows, size):
+    """Разбивка потока строк на пачки."""
+    rows = iter(rows)
+    batch = list(islice(rows, size))
+    while batch:
+        yield batch
+        batch = list(islice(rows, size))
+
+
+class Command(BaseCommand):
+    """Загрузка ингредиентов и тегов из CSV или JSON."""
+
+    help = ('Загружает ингредиенты или теги из CSV/JSON пачками. '
+            'Уже существующие записи пропускаются, повторный запуск '
+            'безопасен.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл .csv, .json или .jsonl.')
+        parser.add_argument('--model', choices=MODELS, default='ingredients')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        reader = READERS.get(os.path.splitext(path)[1].lower())
+        if reader is None:
+            raise CommandError('Поддерживаются файлы .csv, .json и .jsonl')
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+        model, fields = MODELS[options['model']]
+        if connection.vendor == 'postgresql':
+            load = self.load_copy
+        else:
+            load = self.load_bulk
+        rows = clean(reader(path, fields), fields)
+
+        count_before = model.objects.count()
+        started = time.perf_counter()
+        total = 0
+        for batch in batches(rows, options['batch_size']):
+            load(model, fields, batch)
+            total += len(batch)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'Прочитано {total} строк, '
+                              f'{total / elapsed:.0f} строк/с')
+        elapsed = time.perf_counter() - started
+        created = model.objects.count() - count_before
+        if created:
+            bump_catalogue_version()
+        self.stdout.write(self.style.SUCCESS(
+            f'Готово: {total} строк за {elapsed:.2f} с, '
+            f'добавлено {created}, пропущено {total - created}'))
+
+    @staticmethod
+    def load_bulk(model, fields, batch):
+        """Пачка через bulk_create без конфликтующих записей."""
+        model.objects.bulk_create(
+            [model(**dict(zip(fields, row))) for row in batch],
+            ignore_conflicts=True)
+
+    @staticmethod
+    def load_copy(model, fields, batch):
+        """Пачка через COPY во временную таблицу и слияние."""
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        table = connection.ops.quote_name(model._meta.db_table)
+        columns = ', '.join(
+            connection.ops.quote_name(model._meta.get_field(field).column)
+            for field in fields)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'CREATE TEMP TABLE catalogue_staging ON COMMIT DROP AS '
+                f'SELECT {columns} FROM {table} WITH NO DATA')
+            cursor.copy_expert(
+                f'COPY catalogue_staging ({columns}) FROM STDIN '
+                f'WITH (FORMAT csv)', buffer)
+            cursor.execute(
+                f'INSERT INTO {table} ({columns}) '
+                f'SELECT DISTINCT {columns} FROM catalogue_staging '
+                f'ON CONFLICT DO NOTHING')
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import make_thumbnails
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    """Уменьшенные копии картинок для уже созданных рецептов."""
+
+    help = ('Создаёт уменьшенные копии картинок рецептов, у которых их нет '
+            'или они сделаны для прежней картинки.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Пересоздать копии для всех рецептов.')
+
+    def handle(self, *args, **options):
+        done = failed = 0
+        for recipe_id, image, variants in Recipe.objects.exclude(
+                image='').values_list('id', 'image', 'image_variants'
+                                      ).iterator():
+            if not options['all'] and variants.get('source') == image:
+                continue
+            try:
+                make_thumbnails(recipe_id, image)
+                done += 1
+            except Exception as error:
+                failed += 1
+                self.stderr.write(f'Рецепт {recipe_id}: {error}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано {done}, с ошибками {failed}'))
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes import shopping_list
+
+
+class Command(BaseCommand):
+    """Пересборка и проверка списков покупок."""
+
+    help = ('Пересобирает таблицу списков покупок по корзинам '
+            'или сверяет её с корзинами (--check).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Только сверить, ничего не меняя.')
+        parser.add_argument('--user', type=int, action='append',
+                            dest='user_ids',
+                            help='id пользователя, можно несколько раз.')
+
+    def handle(self, *args, **options):
+        user_ids = options['user_ids']
+        if not options['check']:
+            shopping_list.rebuild(user_ids)
+            self.stdout.write(self.style.SUCCESS('Списки покупок пересобраны'))
+            return
+        live = shopping_list.live_totals(user_ids)
+        stored = shopping_list.stored_totals(user_ids)
+        broken = sorted(user_id for user_id in live.keys() | stored.keys()
+                        if live.get(user_id) != stored.get(user_id))
+        if broken:
+            raise CommandError(
+                f'Списки покупок расходятся у {len(broken)} пользователей: '
+                f'{", ".join(map(str, broken[:20]))}')
+        self.stdout.write(self.style.SUCCESS('Списки покупок совпадают'))
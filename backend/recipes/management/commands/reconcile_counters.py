@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes import counters
+
+
+class Command(BaseCommand):
+    """Сверка и исправление счётчиков."""
+
+    help = ('Сверяет счётчики избранного, рецептов и подписчиков с данными '
+            'и исправляет расхождения.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true',
+                            help='Только сверить, ничего не меняя.')
+
+    def handle(self, *args, **options):
+        total = 0
+        for counter in counters.COUNTERS:
+            if options['check']:
+                broken = counters.drift(counter).count()
+            else:
+                broken = counters.reconcile(counter)
+            total += broken
+            self.stdout.write(f'{counter}: расхождений {broken}')
+        if options['check'] and total:
+            raise CommandError(f'Счётчики разошлись у {total} объектов')
+        self.stdout.write(self.style.SUCCESS('Счётчики в порядке'))
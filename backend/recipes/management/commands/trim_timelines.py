@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from recipes import feed
+
+
+class Command(BaseCommand):
+    """Обрезка лент подписок."""
+
+    help = ('Оставляет в каждой ленте подписок только последние записи. '
+            'При публикации рецепта ленты подписчиков обрезаются с '
+            'запасом FEED_TIMELINE_SLACK, команда обрезает все ленты '
+            'точно до FEED_TIMELINE_SIZE.')
+
+    def handle(self, *args, **options):
+        deleted = feed.trim()
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено записей лент: {deleted}'))
@@ -1,8 +1,9 @@
 from colorfield.fields import ColorField
 from django.db import models
+from django.db.models import BooleanField, Exists, OuterRef, Prefetch, Value
 
 from api.validator import cooking_time_validator
-from users.models import User
+from users.models import CounterFieldsMixin, Follow, User
 from constants import MAX_COLOR, MAX_LENGHT, MAX_LENGHT_TEXT
 
 from .validator import more_one
@@ -71,7 +72,35 @@ class Ingredient(models.Model):
         return f'{self.name} {self.measurement_unit}'
 
 
-class Recipe(models.Model):
+class RecipeQuerySet(models.QuerySet):
+    """Кверисет рецептов."""
+
+    def with_user_data(self, user):
+        """Рецепты со связями и отметками пользователя."""
+        if user.is_authenticated:
+            is_favorited = Exists(Favorite.objects.filter(
+                user=user, recipe=OuterRef('pk')))
+            is_in_shopping_cart = Exists(ShoppingCart.objects.filter(
+                user=user, recipe=OuterRef('pk')))
+            is_subscribed = Exists(Follow.objects.filter(
+                user=user, author=OuterRef('pk')))
+        else:
+            is_favorited = is_in_shopping_cart = is_subscribed = Value(
+                False, output_field=BooleanField())
+        return self.annotate(
+            is_favorited=is_favorited,
+            is_in_shopping_cart=is_in_shopping_cart,
+        ).prefetch_related(
+            Prefetch('author', queryset=User.objects.annotate(
+                is_subscribed=is_subscribed)),
+            'tags',
+            Prefetch('ingredients_in_recipe',
+                     queryset=IngredientsInRecipe.objects.select_related(
+                         'ingredient')),
+        )
+
+
+class Recipe(CounterFieldsMixin, models.Model):
     """Модель Рецепта."""
 
     author = models.ForeignKey(
@@ -85,6 +114,12 @@ class Recipe(models.Model):
         upload_to='recipes/',
         blank=False,
     )
+    image_variants = models.JSONField(
+        verbose_name='Уменьшенные копии изображения',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
     name = models.CharField(
         max_length=MAX_LENGHT,
         verbose_name='Название блюда',
@@ -111,16 +146,30 @@ class Recipe(models.Model):
         related_name='recipes',
         through='IngredientsInRecipe',
     )
+    favorites_count = models.IntegerField(
+        verbose_name='Количество добавлений в избранное',
+        default=0,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
+
+    counter_fields = ('favorites_count',)
 
     class Meta:
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-id',)
+        indexes = [models.Index(fields=['author', '-id'],
+                                name='recipe_author_id')]
 
     def __str__(self):
         return f'{self.name}'
 
 
+RecipeTag = Recipe.tags.through
+
+
 class IngredientsInRecipe(models.Model):
     """Модель ингредиентов в рецепте."""
 
@@ -201,3 +250,60 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'{self.user}-{self.recipe}'
+
+
+class ShoppingListItem(models.Model):
+    """Сумма ингредиента в корзине пользователя."""
+
+    user = models.ForeignKey(
+        User,
+        related_name='shopping_list',
+        on_delete=models.CASCADE,
+        verbose_name='Владелец корзины',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        related_name='shopping_list',
+        on_delete=models.CASCADE,
+        verbose_name='Ингредиент',
+    )
+    total_amount = models.IntegerField(
+        verbose_name='Общее количество',
+    )
+
+    class Meta:
+        verbose_name = 'Ингредиент списка покупок'
+        verbose_name_plural = 'Список покупок'
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'ingredient'],
+            name='unique_shopping_list_ingredient')]
+
+    def __str__(self):
+        return f'{self.user}-{self.ingredient} {self.total_amount}'
+
+
+class TimelineEntry(models.Model):
+    """Рецепт в ленте подписчика, записывается при публикации."""
+
+    user = models.ForeignKey(
+        User,
+        related_name='timeline',
+        on_delete=models.CASCADE,
+        verbose_name='Подписчик',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        related_name='timeline_entries',
+        on_delete=models.CASCADE,
+        verbose_name='Рецепт',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Ленты подписок'
+        constraints = [models.UniqueConstraint(
+            fields=['user', 'recipe'],
+            name='unique_timeline_recipe')]
+
+    def __str__(self):
+        return f'{self.user}-{self.recipe}'
@@ -0,0 +1,92 @@
+from django.db import connections
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import Ingredient, Recipe
+
+TABLE = Recipe._meta.db_table
+INGREDIENT_TABLE = Ingredient._meta.db_table
+FTS_TABLE = f'{TABLE}_fts'
+SEARCH_CONFIG = 'russian'
+
+POSTGRESQL_INDEX = (
+    f"ALTER TABLE {TABLE} ADD COLUMN IF NOT EXISTS search_vector tsvector "
+    f"GENERATED ALWAYS AS ("
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(text, '')), 'B')"
+    f") STORED",
+    f'CREATE INDEX IF NOT EXISTS {TABLE}_search_vector '
+    f'ON {TABLE} USING GIN (search_vector)',
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    f'CREATE INDEX IF NOT EXISTS {INGREDIENT_TABLE}_name_trgm '
+    f'ON {INGREDIENT_TABLE} USING GIN (lower(name) gin_trgm_ops)',
+)
+
+SQLITE_INDEX = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"name, text, content='{TABLE}', content_rowid='id', "
+    f"tokenize='unicode61')",
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert '
+    f'AFTER INSERT ON {TABLE} BEGIN '
+    f'INSERT INTO {FTS_TABLE} (rowid, name, text) '
+    f'VALUES (new.id, new.name, new.text); END',
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete '
+    f'AFTER DELETE ON {TABLE} BEGIN '
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, name, text) "
+    f"VALUES ('delete', old.id, old.name, old.text); END",
+    f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update '
+    f'AFTER UPDATE OF name, text ON {TABLE} BEGIN '
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, name, text) "
+    f"VALUES ('delete', old.id, old.name, old.text); "
+    f'INSERT INTO {FTS_TABLE} (rowid, name, text) '
+    f'VALUES (new.id, new.name, new.text); END',
+    f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')",
+)
+
+INDEXES = {'postgresql': POSTGRESQL_INDEX, 'sqlite': SQLITE_INDEX}
+
+
+def install_index(using='default', **kwargs):
+    """Индексы поиска, создаются после миграций.
+
+    В PostgreSQL это вычисляемая колонка tsvector с GIN-индексом для
+    рецептов и триграммный GIN-индекс названий ингредиентов, в SQLite
+    виртуальная таблица FTS5 с триггерами.
+    """
+    connection = connections[using]
+    statements = INDEXES.get(connection.vendor, ())
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def fts_query(query):
+    """Запрос FTS5: каждое слово в кавычках и по префиксу."""
+    words = query.replace('"', ' ').split()
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_recipes(queryset, query):
+    """Рецепты по запросу, самые подходящие первыми."""
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', %s)"
+        match = RawSQL(f'{TABLE}.search_vector @@ {tsquery}', (query,),
+                       output_field=BooleanField())
+        rank = RawSQL(f'ts_rank({TABLE}.search_vector, {tsquery})',
+                      (query,), output_field=FloatField())
+    elif vendor == 'sqlite':
+        query = fts_query(query)
+        if not query:
+            return queryset
+        match = RawSQL(
+            f'{TABLE}.id IN (SELECT rowid FROM {FTS_TABLE} '
+            f'WHERE {FTS_TABLE} MATCH %s)', (query,),
+            output_field=BooleanField())
+        rank = RawSQL(
+            f'(SELECT -rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'AND rowid = {TABLE}.id)', (query,), output_field=FloatField())
+    else:
+        return queryset.filter(name__icontains=query)
+    return queryset.filter(match).annotate(search_rank=rank).order_by(
+        '-search_rank', '-id')
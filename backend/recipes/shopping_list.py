@@ -0,0 +1,128 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F, Sum
+
+from users.models import User
+
+from .models import IngredientsInRecipe, ShoppingCart, ShoppingListItem
+
+
+def recipe_amounts(recipe_ids):
+    """Сумма каждого ингредиента в рецептах."""
+    return dict(IngredientsInRecipe.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('ingredient_id').annotate(Sum('amount')).order_by())
+
+
+def lock_users(user_ids):
+    """Блокировка пользователей, чьи списки покупок меняются."""
+    list(User.objects.select_for_update().filter(
+        pk__in=user_ids).order_by('pk').values('pk'))
+
+
+def apply_deltas(user_id, deltas):
+    """Изменение списка покупок пользователя на deltas по ингредиентам.
+
+    Количество меняется через F(), как в change_recipe, поэтому
+    параллельное изменение тех же строк не теряется.
+    """
+    deltas = {key: value for key, value in deltas.items() if value}
+    if not deltas:
+        return
+    with transaction.atomic():
+        lock_users([user_id])
+        items = ShoppingListItem.objects.filter(
+            user_id=user_id, ingredient_id__in=deltas)
+        to_update = list(items.only('pk', 'ingredient_id'))
+        for item in to_update:
+            item.total_amount = F('total_amount') + deltas[
+                item.ingredient_id]
+        ShoppingListItem.objects.bulk_update(to_update, ['total_amount'])
+        existing = {item.ingredient_id for item in to_update}
+        ShoppingListItem.objects.bulk_create(
+            ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id,
+                             total_amount=delta)
+            for ingredient_id, delta in deltas.items()
+            if delta > 0 and ingredient_id not in existing)
+        items.filter(total_amount__lte=0).delete()
+
+
+def add_recipes(user_id, recipe_ids):
+    """Рецепты добавлены в корзину."""
+    apply_deltas(user_id, recipe_amounts(recipe_ids))
+
+
+def remove_recipes(user_id, recipe_ids):
+    """Рецепты убраны из корзины."""
+    apply_deltas(user_id, {ingredient_id: -amount for ingredient_id, amount
+                           in recipe_amounts(recipe_ids).items()})
+
+
+def change_recipe(recipe, deltas):
+    """Изменились ингредиенты рецепта, который лежит в корзинах."""
+    deltas = {key: value for key, value in deltas.items() if value}
+    if not deltas:
+        return
+    user_ids = list(ShoppingCart.objects.filter(
+        recipe=recipe).values_list('user_id', flat=True))
+    if not user_ids:
+        return
+    with transaction.atomic():
+        lock_users(user_ids)
+        for ingredient_id, delta in deltas.items():
+            items = ShoppingListItem.objects.filter(
+                user_id__in=user_ids, ingredient_id=ingredient_id)
+            items.update(total_amount=F('total_amount') + delta)
+            if delta > 0:
+                existing = set(items.values_list('user_id', flat=True))
+                ShoppingListItem.objects.bulk_create([
+                    ShoppingListItem(user_id=user_id,
+                                     ingredient_id=ingredient_id,
+                                     total_amount=delta)
+                    for user_id in user_ids if user_id not in existing])
+            else:
+                items.filter(total_amount__lte=0).delete()
+
+
+def live_totals(user_ids=None):
+    """Список покупок, посчитанный по корзинам."""
+    carts = ShoppingCart.objects.all()
+    if user_ids is not None:
+        carts = carts.filter(user_id__in=user_ids)
+    totals = defaultdict(dict)
+    for user_id, ingredient_id, amount in carts.values_list(
+            'user_id', 'recipe__ingredients_in_recipe__ingredient_id'
+    ).annotate(
+        Sum('recipe__ingredients_in_recipe__amount')
+    ).order_by().iterator():
+        if ingredient_id is not None:
+            totals[user_id][ingredient_id] = amount
+    return totals
+
+
+def stored_totals(user_ids=None):
+    """Сохранённый список покупок."""
+    items = ShoppingListItem.objects.all()
+    if user_ids is not None:
+        items = items.filter(user_id__in=user_ids)
+    totals = defaultdict(dict)
+    for user_id, ingredient_id, amount in items.values_list(
+            'user_id', 'ingredient_id', 'total_amount').iterator():
+        totals[user_id][ingredient_id] = amount
+    return totals
+
+
+def rebuild(user_ids=None):
+    """Пересборка списков покупок по корзинам."""
+    with transaction.atomic():
+        items = ShoppingListItem.objects.all()
+        if user_ids is not None:
+            items = items.filter(user_id__in=user_ids)
+        items.delete()
+        ShoppingListItem.objects.bulk_create(
+            (ShoppingListItem(user_id=user_id, ingredient_id=ingredient_id,
+                              total_amount=amount)
+             for user_id, amounts in live_totals(user_ids).items()
+             for ingredient_id, amount in amounts.items()),
+            batch_size=1000)
@@ -0,0 +1,108 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from users.models import Follow
+
+from . import counters, feed, shopping_list
+from .images import delete_thumbnails, schedule_thumbnails
+from .models import Favorite, Recipe, ShoppingCart
+
+_muted = ContextVar('recipes_signals_muted', default=False)
+
+
+@contextmanager
+def muted():
+    """Удаление связей без обработчиков: вызывающий сам меняет счётчики.
+
+    Так пакетные операции удаляют связи через QuerySet.delete(), а
+    счётчики и список покупок обновляют одним запросом на пачку.
+    """
+    token = _muted.set(True)
+    try:
+        yield
+    finally:
+        _muted.reset(token)
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    """Ингредиенты рецепта попадают в список покупок."""
+    if created:
+        shopping_list.add_recipes(instance.user_id, [instance.recipe_id])
+
+
+@receiver(pre_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    """Ингредиенты рецепта убираются из списка покупок."""
+    if _muted.get():
+        return
+    shopping_list.remove_recipes(instance.user_id, [instance.recipe_id])
+
+
+@receiver(post_save, sender=Recipe)
+def process_recipe_image(sender, instance, **kwargs):
+    """Новая картинка рецепта уходит на обработку в пул."""
+    if (instance.image
+            and instance.image_variants.get('source') != instance.image.name):
+        schedule_thumbnails(instance)
+
+
+@receiver(post_delete, sender=Recipe)
+def remove_recipe_thumbnails(sender, instance, **kwargs):
+    """Уменьшенные копии удалённого рецепта удаляются после коммита."""
+    transaction.on_commit(partial(delete_thumbnails, instance.image_variants))
+
+
+@receiver(post_save, sender=Favorite)
+def count_favorite(sender, instance, created, **kwargs):
+    """Рецепт добавили в избранное."""
+    if created:
+        counters.change('favorites_count', [instance.recipe_id], 1)
+
+
+@receiver(post_delete, sender=Favorite)
+def uncount_favorite(sender, instance, **kwargs):
+    """Рецепт убрали из избранного."""
+    if _muted.get():
+        return
+    counters.change('favorites_count', [instance.recipe_id], -1)
+
+
+@receiver(post_save, sender=Recipe)
+def count_recipe(sender, instance, created, **kwargs):
+    """Автор создал рецепт.
+
+    В ленты рецепт пишется после коммита, когда теги и ингредиенты
+    уже сохранены, а транзакция запроса закрыта.
+    """
+    if created:
+        counters.change('recipes_count', [instance.author_id], 1)
+        transaction.on_commit(partial(feed.fan_out, instance))
+
+
+@receiver(post_delete, sender=Recipe)
+def uncount_recipe(sender, instance, **kwargs):
+    """Рецепт удалён."""
+    counters.change('recipes_count', [instance.author_id], -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_follower(sender, instance, created, **kwargs):
+    """У автора новый подписчик."""
+    if created:
+        counters.change('followers_count', [instance.author_id], 1)
+        feed.follow(instance.user_id, [instance.author_id])
+
+
+@receiver(post_delete, sender=Follow)
+def uncount_follower(sender, instance, **kwargs):
+    """Подписчик отписался."""
+    if _muted.get():
+        return
+    counters.change('followers_count', [instance.author_id], -1)
+    feed.unfollow(instance.user_id, [instance.author_id])
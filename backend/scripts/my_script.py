@@ -1,7 +1,8 @@
-import csv
 import os
 
-from recipes.models import Ingredient, Tag, User
+from django.core.management import call_command
+
+from recipes.models import Tag, User
 
 TAGS_DATA = [
     {'name': 'Breakfast', 'slug': 'breakfast', 'color': '#00ff00'},
@@ -12,17 +13,13 @@ TAGS_DATA = [
 
 def load_ingredients_from_csv(file_path):
     """Загружает ингредиенты из CSV-файла и сохраняет их в базе данных."""
-    with open(file_path, encoding='utf8') as csv_file:
-        ingredients = csv.reader(csv_file)
-        for row in ingredients:
-            name, measurement_unit = row
-            Ingredient.objects.create(name=name,
-                                      measurement_unit=measurement_unit)
+    call_command('load_catalogue', file_path, model='ingredients')
 
 
 def create_tags():
     """Создает тэги и сохраняет их в базе данных."""
-    Tag.objects.bulk_create([Tag(**tag_data) for tag_data in TAGS_DATA])
+    Tag.objects.bulk_create([Tag(**tag_data) for tag_data in TAGS_DATA],
+                            ignore_conflicts=True)
 
 
 def run():
@@ -0,0 +1,108 @@
+import base64
+import io
+
+import pytest
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientsInRecipe, Recipe, Tag
+from users.models import User
+
+PASSWORD = 'Pass!12345'
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Кеш токенов и справочников не переживает тест."""
+    from django.core.cache import cache
+
+    from api import authentication
+    cache.clear()
+    authentication._local.clear()
+    yield
+    cache.clear()
+    authentication._local.clear()
+
+
+@pytest.fixture
+def image():
+    """Картинка в base64, как её присылает фронтенд."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4), 'red').save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+@pytest.fixture
+def make_user(db):
+    """Фабрика пользователей."""
+    def make(name):
+        return User.objects.create_user(
+            username=name, email=f'{name}@example.com', first_name=name,
+            last_name=name, password=PASSWORD)
+    return make
+
+
+@pytest.fixture
+def user(make_user):
+    """Автор рецептов."""
+    return make_user('author')
+
+
+@pytest.fixture
+def another_user(make_user):
+    """Второй пользователь."""
+    return make_user('reader')
+
+
+@pytest.fixture
+def client_for():
+    """Клиент API с токеном пользователя или гостевой."""
+    def make(user=None):
+        client = APIClient()
+        if user is not None:
+            token, _ = Token.objects.get_or_create(user=user)
+            client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+    return make
+
+
+@pytest.fixture
+def tags(db):
+    """Три тега."""
+    return [Tag.objects.create(name=f'тег {index}', slug=f'tag{index}',
+                               color=f'#00000{index}')
+            for index in range(3)]
+
+
+@pytest.fixture
+def ingredients(db):
+    """Шесть ингредиентов."""
+    return [Ingredient.objects.create(name=f'ингредиент {index}',
+                                      measurement_unit='г')
+            for index in range(6)]
+
+
+@pytest.fixture
+def make_recipe(tags, ingredients):
+    """Фабрика рецептов с тегами и ингредиентами."""
+    def make(author, name='Рецепт', tag_count=2, ingredient_count=3):
+        recipe = Recipe.objects.create(
+            author=author, name=name, text='Описание', cooking_time=10,
+            image='recipes/test.png',
+            image_variants={'source': 'recipes/test.png'})
+        recipe.tags.set(tags[:tag_count])
+        IngredientsInRecipe.objects.bulk_create(
+            IngredientsInRecipe(recipe=recipe, ingredient=ingredient,
+                                amount=index + 1)
+            for index, ingredient in enumerate(
+                ingredients[:ingredient_count]))
+        return recipe
+    return make
+
+
+@pytest.fixture
+def recipe(make_recipe, user):
+    """Рецепт автора."""
+    return make_recipe(user)
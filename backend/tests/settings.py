@@ -0,0 +1,27 @@
+import os
+import tempfile
+
+os.environ.setdefault('ALLOWED_HOSTS', 'testserver localhost')
+
+from foodgram.settings import *  # noqa: E402, F401, F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+MEDIA_ROOT = tempfile.mkdtemp(prefix='foodgram-tests-')
+
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+REQUEST_METRICS_SAMPLE_RATE = 0
+
+QUERY_BUDGET_STRICT = True
@@ -0,0 +1,74 @@
+import asyncio
+import importlib
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.test import AsyncClient
+from django.urls import clear_url_caches
+from rest_framework.authtoken.models import Token
+
+from api import urls
+from users.models import Follow
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+@pytest.fixture
+def async_routes(settings):
+    """Маршруты api собираются с ASYNC_VIEWS=True."""
+    settings.ASYNC_VIEWS = True
+    importlib.reload(urls)
+    clear_url_caches()
+    yield
+    settings.ASYNC_VIEWS = False
+    importlib.reload(urls)
+    clear_url_caches()
+
+
+def get(path, user=None):
+    """GET через AsyncClient, как под ASGI."""
+    headers = {}
+    if user is not None:
+        token, _ = Token.objects.get_or_create(user=user)
+        headers['authorization'] = f'Token {token.key}'
+
+    async def fetch():
+        return await AsyncClient().get(path, **headers)
+    return async_to_sync(fetch)()
+
+
+def test_routes_are_async(async_routes):
+    """Маршруты из ASYNC_ROUTES заменены асинхронными вьюхами."""
+    callbacks = {pattern.name: pattern.callback
+                 for pattern in urls.router.urls}
+    for name in urls.ASYNC_ROUTES:
+        assert asyncio.iscoroutinefunction(callbacks[name]), name
+
+
+@pytest.mark.parametrize('path', ['/api/tags/', '/api/ingredients/',
+                                  '/api/recipes/?limit=5'])
+def test_catalogue_routes(async_routes, recipe, another_user, path):
+    """Списки отдаются гостю и пользователю."""
+    for user in (None, another_user):
+        response = get(path, user)
+        assert response.status_code == 200, response.content
+        assert 'Server-Timing' in response
+
+
+def test_recipe_detail(async_routes, recipe, another_user):
+    """Рецепт отдаётся с отметками пользователя."""
+    response = get(f'/api/recipes/{recipe.pk}/', another_user)
+
+    assert response.status_code == 200
+    assert response.json()['id'] == recipe.pk
+
+
+def test_subscriptions(async_routes, recipe, user, another_user):
+    """Подписки пользователя с рецептами автора."""
+    Follow.objects.create(user=another_user, author=user)
+
+    response = get('/api/users/subscriptions/', another_user)
+
+    assert response.status_code == 200
+    assert [author['id'] for author in response.json()['results']] == [
+        user.pk]
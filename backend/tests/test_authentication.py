@@ -0,0 +1,77 @@
+import time
+
+from django.conf import settings
+from rest_framework.authtoken.models import Token
+
+from api import authentication
+from tests.conftest import PASSWORD
+from users.models import User
+
+
+def test_cached_token_does_not_save_stale_user(user, client_for):
+    """Смена пароля с токеном из кеша не откатывает свежие поля."""
+    client = client_for(user)
+    assert client.get('/api/users/me/').status_code == 200
+    User.objects.filter(pk=user.pk).update(first_name='Свежее')
+
+    response = client.post('/api/users/set_password/', {
+        'current_password': PASSWORD, 'new_password': 'New!pass54321'})
+
+    assert response.status_code == 204
+    user.refresh_from_db()
+    assert user.first_name == 'Свежее'
+    assert user.check_password('New!pass54321')
+
+
+def test_cached_token_skips_user_query(user, client_for,
+                                       django_assert_num_queries):
+    """Повторный запрос берёт пользователя из кеша без запроса к базе."""
+    client = client_for(user)
+    client.get('/api/tags/')
+    with django_assert_num_queries(0):
+        response = client.get('/api/tags/')
+    assert response.status_code == 200
+    assert authentication.stats['local'] >= 1
+
+
+def test_cached_user_loads_fields_in_one_query(user,
+                                               django_assert_num_queries):
+    """Отложенные поля пользователя из кеша читаются одним запросом."""
+    cached = authentication.cached_user(user.pk, True)
+    with django_assert_num_queries(1):
+        assert (cached.username, cached.email) == (user.username,
+                                                   user.email)
+
+
+def test_deactivated_user_is_rejected(user, client_for):
+    """Деактивация сбрасывает кеш токена."""
+    client = client_for(user)
+    assert client.get('/api/users/me/').status_code == 200
+    user.is_active = False
+    user.save()
+
+    assert client.get('/api/users/me/').status_code == 401
+
+
+def test_queryset_deactivation_needs_invalidation(user, client_for):
+    """После QuerySet.update() токен сбрасывается invalidate_user_tokens."""
+    client = client_for(user)
+    assert client.get('/api/users/me/').status_code == 200
+    User.objects.filter(pk=user.pk).update(is_active=False)
+
+    authentication.invalidate_user_tokens([user.pk])
+
+    assert client.get('/api/users/me/').status_code == 401
+
+
+def test_other_worker_forgets_revoked_token(user, client_for):
+    """Кеш другого воркера держит отозванный токен не дольше своего TTL."""
+    client = client_for(user)
+    key = Token.objects.get(user=user).key
+    Token.objects.filter(key=key).delete()
+    authentication._local[key] = (user.pk, True)
+
+    assert client.get('/api/users/me/').status_code == 200
+    authentication._local.expire(
+        time.monotonic() + settings.TOKEN_CACHE_LOCAL_TTL + 1)
+    assert client.get('/api/users/me/').status_code == 401
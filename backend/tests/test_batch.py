@@ -0,0 +1,97 @@
+import pytest
+from django.core.management import call_command
+from django.db import connection
+
+from api import batch
+from recipes.models import Favorite, Recipe, ShoppingCart, ShoppingListItem
+from users.models import Follow, User
+
+
+@pytest.fixture
+def recipes(make_recipe, user):
+    """Три рецепта автора."""
+    return [make_recipe(user, name=f'Рецепт {index}') for index in range(3)]
+
+
+def assert_consistent():
+    """Счётчики и списки покупок сходятся с данными."""
+    call_command('reconcile_counters', check=True)
+    call_command('rebuild_shopping_lists', check=True)
+
+
+@pytest.mark.parametrize('url', ['favorite', 'shopping_cart'])
+def test_double_batch_add_counts_once(url, recipes, another_user,
+                                      client_for):
+    """Повторный пакет (двойной клик) ничего не считает второй раз."""
+    client = client_for(another_user)
+    ids = [recipe.pk for recipe in recipes]
+    for _ in range(2):
+        response = client.post(f'/api/recipes/batch/{url}/', {'ids': ids},
+                               format='json')
+        assert response.status_code == 200
+    assert [item['status'] for item in response.data['results']] == [
+        'exists'] * 3
+    assert_consistent()
+    if url == 'favorite':
+        assert set(Recipe.objects.values_list(
+            'favorites_count', flat=True)) == {1}
+    else:
+        assert ShoppingListItem.objects.filter(
+            user=another_user).count() == 3
+
+
+@pytest.mark.parametrize('url', ['favorite', 'shopping_cart'])
+def test_batch_remove_uses_delete_and_keeps_data_consistent(
+        url, recipes, another_user, client_for):
+    """Удаление пачкой обновляет счётчики и список покупок один раз."""
+    client = client_for(another_user)
+    ids = [recipe.pk for recipe in recipes]
+    client.post(f'/api/recipes/batch/{url}/', {'ids': ids}, format='json')
+    for _ in range(2):
+        response = client.delete(f'/api/recipes/batch/{url}/',
+                                 {'ids': ids}, format='json')
+        assert response.status_code == 200
+    assert [item['status'] for item in response.data['results']] == [
+        'absent'] * 3
+    assert not Favorite.objects.exists()
+    assert not ShoppingCart.objects.exists()
+    assert not ShoppingListItem.objects.exists()
+    assert_consistent()
+
+
+def test_batch_unsubscribe_keeps_followers_count(user, another_user,
+                                                 client_for):
+    """Отписка пачкой уменьшает счётчик подписчиков один раз."""
+    client = client_for(another_user)
+    client.post('/api/users/batch/subscribe/', {'ids': [user.pk]},
+                format='json')
+    client.delete('/api/users/batch/subscribe/', {'ids': [user.pk]},
+                  format='json')
+    assert not Follow.objects.exists()
+    assert User.objects.get(pk=user.pk).followers_count == 0
+    assert_consistent()
+
+
+@pytest.mark.parametrize('method', ['add', 'remove'])
+def test_links_are_checked_inside_locked_transaction(method, recipes,
+                                                     another_user,
+                                                     monkeypatch):
+    """Связи проверяются после блокировки пользователя в транзакции."""
+    calls = []
+    outer_blocks = len(connection.savepoint_ids)
+    original_lock = batch.BatchRelation.lock
+    original_linked = batch.BatchRelation.linked
+
+    def lock(user):
+        calls.append('lock')
+        return original_lock(user)
+
+    def linked(self, user, ids):
+        assert len(connection.savepoint_ids) > outer_blocks
+        calls.append('linked')
+        return original_linked(self, user, ids)
+
+    monkeypatch.setattr(batch.BatchRelation, 'lock', staticmethod(lock))
+    monkeypatch.setattr(batch.BatchRelation, 'linked', linked)
+    getattr(batch.favorites, method)(another_user, [recipes[0].pk])
+    assert calls == ['lock', 'linked']
@@ -0,0 +1,56 @@
+from django.core.management import call_command
+
+from recipes.models import Favorite, Recipe
+from tests.conftest import PASSWORD
+from users.models import Follow, User
+
+
+def test_set_password_keeps_followers_count(user, another_user,
+                                            client_for):
+    """Смена пароля не откатывает число подписчиков."""
+    client = client_for(user)
+    assert client.get('/api/users/me/').status_code == 200
+    Follow.objects.create(user=another_user, author=user)
+
+    response = client.post('/api/users/set_password/', {
+        'current_password': PASSWORD, 'new_password': 'New!pass54321'})
+
+    assert response.status_code == 204
+    user.refresh_from_db()
+    assert user.followers_count == 1
+    assert user.check_password('New!pass54321')
+    call_command('reconcile_counters', check=True)
+
+
+def test_recipe_patch_keeps_favorites_count(recipe, user, another_user,
+                                            client_for, tags,
+                                            ingredients):
+    """Правка рецепта не откатывает число добавлений в избранное."""
+    stale = Recipe.objects.get(pk=recipe.pk)
+    Favorite.objects.create(user=another_user, recipe=recipe)
+
+    stale.name = 'Новое название'
+    stale.save()
+    response = client_for(user).patch(
+        f'/api/recipes/{recipe.pk}/',
+        {'name': 'Ещё название', 'tags': [tags[0].pk],
+         'ingredients': [{'id': ingredients[0].pk, 'amount': 5}]},
+        format='json')
+
+    assert response.status_code == 200
+    recipe.refresh_from_db()
+    assert recipe.favorites_count == 1
+    assert recipe.name == 'Ещё название'
+    call_command('reconcile_counters', check=True)
+
+
+def test_save_with_update_fields_skips_counters(user):
+    """Счётчик из update_fields не пишется."""
+    User.objects.filter(pk=user.pk).update(recipes_count=7)
+    user.recipes_count = 0
+    user.first_name = 'Имя'
+
+    user.save(update_fields=['first_name', 'recipes_count'])
+
+    user.refresh_from_db()
+    assert (user.first_name, user.recipes_count) == ('Имя', 7)
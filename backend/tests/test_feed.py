@@ -0,0 +1,44 @@
+from functools import partial
+
+from recipes import feed
+from recipes.models import TimelineEntry
+from users.models import Follow
+
+
+def timeline(user):
+    """Рецепты в ленте пользователя по id, новые первыми."""
+    return list(TimelineEntry.objects.filter(user=user).order_by(
+        '-recipe_id').values_list('recipe_id', flat=True))
+
+
+def test_fan_out_after_commit(user, another_user, make_recipe,
+                              django_capture_on_commit_callbacks):
+    """Рецепт попадает в ленты только после коммита транзакции."""
+    Follow.objects.create(user=another_user, author=user)
+
+    with django_capture_on_commit_callbacks() as callbacks:
+        recipe = make_recipe(user)
+        assert timeline(another_user) == []
+    fan_outs = [callback for callback in callbacks
+                if isinstance(callback, partial)
+                and callback.func is feed.fan_out]
+    assert len(fan_outs) == 1
+    fan_outs[0]()
+
+    assert timeline(another_user) == [recipe.pk]
+
+
+def test_fan_out_trims_timelines(user, another_user, make_recipe,
+                                 monkeypatch):
+    """Лента не вырастает больше размера с запасом."""
+    monkeypatch.setattr(feed, 'FEED_TIMELINE_SIZE', 3)
+    monkeypatch.setattr(feed, 'FEED_TIMELINE_SLACK', 2)
+    Follow.objects.create(user=another_user, author=user)
+    recipes = []
+    for index in range(8):
+        recipes.append(make_recipe(user, name=f'Рецепт {index}'))
+        feed.fan_out(recipes[-1])
+        assert len(timeline(another_user)) <= 5
+
+    assert timeline(another_user)[:3] == [
+        recipe.pk for recipe in reversed(recipes[-3:])]
@@ -0,0 +1,23 @@
+import re
+from io import StringIO
+
+from django.core.management import call_command
+
+from recipes.models import Favorite, Recipe
+from users.models import Follow, User
+
+
+def test_reports_rows_actually_written(tags, ingredients):
+    """Отчёт считает записанные строки, а не попытки вставки."""
+    out = StringIO()
+
+    call_command('generate_dataset', users=5, recipes=8, favorites=60,
+                 shopping_cart=5, follows=40, batch_size=20, processes=1,
+                 stdout=out)
+
+    reported = dict(re.findall(r'^(\w+): (\d+) из \d+ строк',
+                               out.getvalue(), re.MULTILINE))
+    assert int(reported['users']) == User.objects.count() == 5
+    assert int(reported['recipes']) == Recipe.objects.count() == 8
+    assert int(reported['favorites']) == Favorite.objects.count() < 60
+    assert int(reported['follows']) == Follow.objects.count() < 40
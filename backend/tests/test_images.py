@@ -0,0 +1,71 @@
+import io
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image
+
+from constants import THUMBNAIL_SIZES
+from recipes.images import make_thumbnails, thumbnail_name
+from recipes.models import Recipe
+
+
+def save_image(name):
+    """Картинка PNG в хранилище."""
+    buffer = io.BytesIO()
+    Image.new('RGB', (40, 30), 'red').save(buffer, 'PNG')
+    return default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def thumbnails(recipe):
+    """Файлы уменьшенных копий рецепта из базы."""
+    recipe.refresh_from_db()
+    return [name for size_name, name in recipe.image_variants.items()
+            if size_name != 'source']
+
+
+@pytest.fixture
+def recipe_with_thumbnails(recipe):
+    """Рецепт с настоящей картинкой и её уменьшенными копиями."""
+    image = save_image('recipes/first.png')
+    Recipe.objects.filter(pk=recipe.pk).update(image=image)
+    make_thumbnails(recipe.pk, image)
+    return recipe
+
+
+def test_replaced_image_removes_old_thumbnails(recipe_with_thumbnails):
+    """После замены картинки старые копии удаляются."""
+    old = thumbnails(recipe_with_thumbnails)
+    assert old and all(default_storage.exists(name) for name in old)
+    image = save_image('recipes/second.png')
+    Recipe.objects.filter(pk=recipe_with_thumbnails.pk).update(image=image)
+
+    make_thumbnails(recipe_with_thumbnails.pk, image)
+
+    new = thumbnails(recipe_with_thumbnails)
+    assert not any(default_storage.exists(name) for name in old)
+    assert all(default_storage.exists(name) for name in new)
+
+
+def test_stale_image_thumbnails_are_dropped(recipe_with_thumbnails):
+    """Копии картинки, которую успели заменить, не остаются в хранилище."""
+    current = thumbnails(recipe_with_thumbnails)
+    stale = save_image('recipes/stale.png')
+
+    make_thumbnails(recipe_with_thumbnails.pk, stale)
+
+    assert thumbnails(recipe_with_thumbnails) == current
+    assert all(default_storage.exists(name) for name in current)
+    assert not any(default_storage.exists(thumbnail_name(stale, size_name))
+                   for size_name in THUMBNAIL_SIZES)
+
+
+def test_deleted_recipe_removes_thumbnails(
+        recipe_with_thumbnails, django_capture_on_commit_callbacks):
+    """Удаление рецепта удаляет копии после коммита."""
+    names = thumbnails(recipe_with_thumbnails)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        recipe_with_thumbnails.delete()
+
+    assert not any(default_storage.exists(name) for name in names)
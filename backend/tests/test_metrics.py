@@ -0,0 +1,50 @@
+import re
+
+import pytest
+
+from api.metrics import QueryBudgetExceeded
+
+TIMING_FIELDS = ('db', 'serializer', 'render', 'total')
+
+
+def server_timing(response):
+    """Метрики заголовка Server-Timing по имени."""
+    return {name: params for name, params in (
+        metric.split(';', 1) for metric in
+        response['Server-Timing'].split(', '))}
+
+
+def test_server_timing_fields(recipe, another_user, client_for):
+    """В заголовке время базы, сериализации, рендера и число SQL."""
+    response = client_for(another_user).get('/api/recipes/')
+
+    assert response.status_code == 200
+    metrics = server_timing(response)
+    assert set(TIMING_FIELDS) <= set(metrics)
+    for name in TIMING_FIELDS:
+        assert re.match(r'dur=\d+\.\d', metrics[name]), metrics[name]
+    queries = re.search(r'desc="(\d+) queries"', metrics['db'])
+    assert queries and 0 < int(queries.group(1)) <= 6
+    assert metrics['auth'] == 'desc="db"'
+
+
+def test_lowered_budget_fails(recipe, client_for, settings):
+    """Действие сверх бюджета падает в строгом режиме."""
+    settings.QUERY_BUDGETS = {**settings.QUERY_BUDGETS,
+                              'RecipeViewsSet.list': 1}
+
+    with pytest.raises(QueryBudgetExceeded, match='RecipeViewsSet.list'):
+        client_for().get('/api/recipes/')
+
+
+def test_budget_only_logged_outside_strict_mode(recipe, client_for,
+                                                settings, caplog):
+    """Без строгого режима превышение только пишется в лог."""
+    settings.QUERY_BUDGET_STRICT = False
+    settings.QUERY_BUDGETS = {**settings.QUERY_BUDGETS,
+                              'RecipeViewsSet.list': 1}
+
+    response = client_for().get('/api/recipes/')
+
+    assert response.status_code == 200
+    assert 'при бюджете 1' in caplog.text
@@ -0,0 +1,20 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from recipes.models import Favorite, ShoppingCart
+
+
+def test_recipe_filters_use_indexes(recipe, another_user):
+    """Фильтры рецептов не читают связанные таблицы целиком.
+
+    Без ANALYZE SQLite считает таблицы большими, поэтому планы на
+    маленькой тестовой базе такие же, как на рабочей.
+    """
+    Favorite.objects.create(user=another_user, recipe=recipe)
+    ShoppingCart.objects.create(user=another_user, recipe=recipe)
+    out = StringIO()
+
+    call_command('check_query_plans', user=another_user.pk, stdout=out)
+
+    assert 'Все фильтры идут по индексам' in out.getvalue()
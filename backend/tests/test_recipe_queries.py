@@ -0,0 +1,57 @@
+import pytest
+
+from recipes.models import Favorite, ShoppingCart
+from users.models import Follow
+
+PAGE_SIZES = (1, 5, 10, 30)
+# count, страница, авторы, теги, ингредиенты
+LIST_QUERIES = 5
+# рецепт, автор, теги, ингредиенты
+DETAIL_QUERIES = 4
+# токен и пользователь при первом запросе
+AUTH_QUERIES = 1
+
+
+@pytest.fixture
+def catalogue(make_user, make_recipe):
+    """35 рецептов трёх авторов, часть в избранном и корзине."""
+    authors = [make_user(f'cook{index}') for index in range(3)]
+    recipes = [make_recipe(authors[index % 3], name=f'Рецепт {index}',
+                           tag_count=1 + index % 3,
+                           ingredient_count=1 + index % 5)
+               for index in range(35)]
+    return authors, recipes
+
+
+@pytest.fixture(params=['guest', 'user'])
+def viewer(request, catalogue, another_user, client_for):
+    """Гостевой клиент или пользователь с подписками и избранным."""
+    if request.param == 'guest':
+        return client_for(), 0
+    authors, recipes = catalogue
+    Follow.objects.create(user=another_user, author=authors[0])
+    for recipe in recipes[:10]:
+        Favorite.objects.create(user=another_user, recipe=recipe)
+        ShoppingCart.objects.create(user=another_user, recipe=recipe)
+    return client_for(another_user), AUTH_QUERIES
+
+
+@pytest.mark.parametrize('limit', PAGE_SIZES)
+def test_recipe_list_queries_do_not_grow(limit, viewer,
+                                         django_assert_num_queries):
+    """Число запросов списка не зависит от размера страницы."""
+    client, auth_queries = viewer
+    with django_assert_num_queries(LIST_QUERIES + auth_queries):
+        response = client.get(f'/api/recipes/?limit={limit}')
+    assert response.status_code == 200
+    assert len(response.data['results']) == limit
+
+
+def test_recipe_detail_queries(viewer, catalogue,
+                               django_assert_num_queries):
+    """Рецепт читается фиксированным числом запросов."""
+    client, auth_queries = viewer
+    _, recipes = catalogue
+    with django_assert_num_queries(DETAIL_QUERIES + auth_queries):
+        response = client.get(f'/api/recipes/{recipes[0].pk}/')
+    assert response.status_code == 200
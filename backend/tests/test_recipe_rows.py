@@ -0,0 +1,42 @@
+import json
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+
+from api.recipe_rows import recipe_rows, represent_recipes
+from api.serializers import RecipeSerializer
+from recipes.management.commands.check_recipe_rows import first_difference
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Follow
+
+
+@pytest.fixture
+def recipes(user, another_user, make_user, make_recipe):
+    """Рецепты двух авторов, часть в избранном, корзине и подписках."""
+    cook = make_user('cook')
+    recipes = [make_recipe((user, cook)[index % 2], name=f'Рецепт {index}',
+                           tag_count=index % 4,
+                           ingredient_count=index % 5)
+               for index in range(8)]
+    Follow.objects.create(user=another_user, author=cook)
+    for recipe in recipes[::3]:
+        Favorite.objects.create(user=another_user, recipe=recipe)
+    for recipe in recipes[1::3]:
+        ShoppingCart.objects.create(user=another_user, recipe=recipe)
+    return recipes
+
+
+@pytest.mark.parametrize('viewer', ['guest', 'user'])
+def test_rows_match_serializer(recipes, another_user, viewer):
+    """represent_recipes совпадает с RecipeSerializer вплоть до порядка."""
+    request = RequestFactory().get('/api/recipes/')
+    request.user = another_user if viewer == 'user' else AnonymousUser()
+    queryset = Recipe.objects.with_user_data(request.user)
+
+    expected = json.loads(json.dumps(RecipeSerializer(
+        queryset.all(), many=True, context={'request': request}).data))
+    actual = represent_recipes(recipe_rows(queryset.all()), request)
+
+    assert len(actual) == len(recipes)
+    assert first_difference(expected, actual) is None
@@ -0,0 +1,28 @@
+import pytest
+
+
+@pytest.fixture
+def soups(user, make_recipe):
+    """Рецепты, где порядок по релевантности не совпадает с -id."""
+    return [make_recipe(user, name=name) for name in (
+        'Борщ борщ борщ', 'Борщ', 'Борщ борщ', 'Щи')]
+
+
+@pytest.mark.parametrize('params', ['', '&pagination=cursor', '&cursor=x'])
+def test_search_keeps_rank_order(soups, client_for, params):
+    """С поиском курсорная пагинация не меняет порядок выдачи."""
+    response = client_for().get(f'/api/recipes/?search=борщ{params}')
+
+    assert response.status_code == 200
+    assert [recipe['id'] for recipe in response.data['results']] == [
+        soups[0].pk, soups[2].pk, soups[1].pk]
+    assert response.data['count'] == 3
+
+
+def test_cursor_without_search(soups, client_for):
+    """Без поиска курсор по-прежнему сортирует по -id."""
+    response = client_for().get('/api/recipes/?pagination=cursor&limit=2')
+
+    assert [recipe['id'] for recipe in response.data['results']] == [
+        soups[3].pk, soups[2].pk]
+    assert 'cursor=' in response.data['next']
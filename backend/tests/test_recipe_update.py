@@ -0,0 +1,71 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.serializers import RecipesSerializerPost
+from recipes.models import IngredientsInRecipe, RecipeTag
+
+WRITES = ('INSERT', 'UPDATE', 'DELETE')
+RELATION_TABLES = (RecipeTag._meta.db_table,
+                   IngredientsInRecipe._meta.db_table)
+
+
+def relation_writes(queries):
+    """Запросы, которые пишут в таблицы тегов и ингредиентов рецепта."""
+    return [query['sql'] for query in queries
+            if query['sql'].startswith(WRITES)
+            and any(table in query['sql'] for table in RELATION_TABLES)]
+
+
+def test_title_only_patch_skips_relations(recipe, user, client_for):
+    """PATCH только названия не трогает теги и ингредиенты."""
+    tags = list(recipe.tags.values_list('pk', flat=True))
+    amounts = list(recipe.ingredients_in_recipe.values_list(
+        'ingredient_id', 'amount'))
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client_for(user).patch(
+            f'/api/recipes/{recipe.pk}/', {'name': 'Новое название'},
+            format='json')
+
+    assert response.status_code == 200, response.data
+    assert response.data['name'] == 'Новое название'
+    assert relation_writes(queries.captured_queries) == []
+    assert list(recipe.tags.values_list('pk', flat=True)) == tags
+    assert list(recipe.ingredients_in_recipe.values_list(
+        'ingredient_id', 'amount')) == amounts
+
+
+def test_patch_validates_relations_that_are_sent(recipe, user, client_for):
+    """Переданные в PATCH связи проверяются как обычно."""
+    response = client_for(user).patch(
+        f'/api/recipes/{recipe.pk}/', {'tags': []}, format='json')
+
+    assert response.status_code == 400
+    assert set(response.data) == {'tags'}
+
+
+def test_full_update_requires_relations(recipe, image):
+    """Без partial теги и ингредиенты обязательны."""
+    serializer = RecipesSerializerPost(recipe, data={
+        'name': 'Новое название', 'text': 'Текст', 'cooking_time': 5,
+        'image': image, 'tags': [], 'ingredients': []})
+
+    assert not serializer.is_valid()
+    assert set(serializer.errors) == {'ingredients', 'tags'}
+
+
+def test_all_relation_errors_in_one_response(recipe, user, client_for,
+                                             ingredients, tags):
+    """Количество, неизвестный id и повтор тега приходят одним ответом."""
+    response = client_for(user).patch(f'/api/recipes/{recipe.pk}/', {
+        'ingredients': [{'id': ingredients[0].pk, 'amount': 0},
+                        {'id': 999999, 'amount': 1}],
+        'tags': [tags[0].pk, tags[0].pk]}, format='json')
+
+    assert response.status_code == 400
+    assert response.data == {
+        'ingredients': [
+            'не правильное значение количества у ингредиентов '
+            f'с id [{ingredients[0].pk}]',
+            'Нет ингредиентов с id [999999]'],
+        'tags': [f'Тег не должен повторяться: [{tags[0].pk}]']}
@@ -0,0 +1,24 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer
+from recipes.management.commands.benchmark_renderers import SPECIAL_VALUES
+
+
+def test_special_values_match_drf():
+    """Decimal, даты, ленивые строки и разделители строк как в DRF."""
+    data = {**SPECIAL_VALUES, 'items': [None, 1.5, {'nested': True}]}
+
+    assert FastJSONRenderer().render(data) == JSONRenderer().render(data)
+
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf'),
+                                   float('-inf')])
+def test_non_finite_floats_raise_like_drf(value):
+    """Бесконечность и NaN не превращаются в null."""
+    data = {'results': [{'rank': value}], 'next': None}
+
+    with pytest.raises(ValueError, match='not JSON compliant'):
+        JSONRenderer().render(data)
+    with pytest.raises(ValueError, match='not JSON compliant'):
+        FastJSONRenderer().render(data)
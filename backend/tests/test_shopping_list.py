@@ -0,0 +1,44 @@
+from django.db.models import F
+
+from recipes import shopping_list
+from recipes.models import ShoppingCart, ShoppingListItem
+
+
+def totals(user):
+    """Сохранённый список покупок пользователя."""
+    return dict(ShoppingListItem.objects.filter(user=user).values_list(
+        'ingredient_id', 'total_amount'))
+
+
+def test_parallel_change_is_not_lost(recipe, another_user, monkeypatch):
+    """Изменение строк между чтением и записью apply_deltas сохраняется."""
+    ShoppingCart.objects.create(user=another_user, recipe=recipe)
+    before = totals(another_user)
+    ingredient_id = next(iter(before))
+    bulk_update = ShoppingListItem.objects.bulk_update
+
+    def interleaved(objs, fields, **kwargs):
+        """Обновление change_recipe прямо перед записью apply_deltas."""
+        ShoppingListItem.objects.filter(
+            user=another_user, ingredient_id=ingredient_id
+        ).update(total_amount=F('total_amount') + 5)
+        return bulk_update(objs, fields, **kwargs)
+
+    monkeypatch.setattr(ShoppingListItem.objects, 'bulk_update', interleaved)
+    shopping_list.apply_deltas(another_user.pk, {ingredient_id: 2})
+
+    assert totals(another_user)[ingredient_id] == before[ingredient_id] + 7
+
+
+def test_apply_deltas_creates_and_deletes_items(recipe, another_user,
+                                                ingredients):
+    """Новые ингредиенты добавляются, обнулённые удаляются."""
+    ShoppingCart.objects.create(user=another_user, recipe=recipe)
+    before = totals(another_user)
+    removed, kept = list(before)[:2]
+    shopping_list.apply_deltas(another_user.pk, {
+        removed: -before[removed], kept: 1, ingredients[5].pk: 3})
+
+    assert totals(another_user) == {
+        **{key: value for key, value in before.items() if key != removed},
+        kept: before[kept] + 1, ingredients[5].pk: 3}
@@ -1,6 +1,9 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
+from recipes.admin_filters import (AuthorEmailFilter, EstimatedCountPaginator,
+                                   UserEmailFilter)
+
 from .models import Follow, User
 
 
@@ -9,11 +12,13 @@ class UserAdmin(BaseUserAdmin):
     """Админ пользователей."""
 
     list_display = ('id', 'email', 'username', 'first_name',
-                    'last_name')
+                    'last_name', 'recipes_count', 'followers_count')
     search_fields = ('username', 'email')
-    list_filter = ('first_name', 'last_name')
+    list_filter = ('is_staff', 'is_active')
     ordering = ('id',)
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Follow)
@@ -21,7 +26,11 @@ class FollowAdmin(admin.ModelAdmin):
     """Админ подписок."""
 
     list_display = ('user', 'author',)
-    search_fields = ('user', 'author',)
-    list_filter = ('user', 'author',)
+    list_select_related = ('user', 'author')
+    search_fields = ('user__email', 'author__email')
+    list_filter = (UserEmailFilter, AuthorEmailFilter)
+    autocomplete_fields = ('user', 'author')
     ordering = ('id',)
     empty_value_display = '-пусто-'
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -5,7 +5,32 @@ from django.db import models
 from constants import MAX_LENGHT, MAX_LENGHT_EMAIL
 
 
-class User(AbstractUser):
+class CounterFieldsMixin:
+    """Счётчики не пишутся в save(), их меняют только F()-обновления.
+
+    Иначе полный save() вернёт в базу значение, прочитанное до чужой
+    подписки или добавления в избранное.
+    """
+
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = [
+                name for name in update_fields
+                if name not in self.counter_fields]
+        elif not self._state.adding and not kwargs.get('force_insert'):
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred]
+        super().save(*args, **kwargs)
+
+
+class User(CounterFieldsMixin, AbstractUser):
     """Модель пользователя."""
 
     USERNAME_FIELD = 'email'
@@ -25,12 +50,31 @@ class User(AbstractUser):
         unique=True,
         validators=(UnicodeUsernameValidator(), )
     )
+    recipes_count = models.IntegerField(
+        verbose_name='Количество рецептов',
+        default=0,
+        editable=False,
+    )
+    followers_count = models.IntegerField(
+        verbose_name='Количество подписчиков',
+        default=0,
+        editable=False,
+    )
+
+    counter_fields = ('recipes_count', 'followers_count')
 
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ('id',)
 
+    def refresh_from_db(self, using=None, fields=None):
+        """Отложенные поля догружаются разом, а не по одному."""
+        deferred = self.get_deferred_fields()
+        if fields is not None and deferred.issuperset(fields):
+            fields = deferred
+        super().refresh_from_db(using, fields)
+
     def __str__(self):
         return f'{self.username}'
 